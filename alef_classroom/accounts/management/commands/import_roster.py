@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.roster_import import BATCH_SIZE, RosterError, import_roster
+from classroom.models import Classroom
+
+
+class Command(BaseCommand):
+    help = 'Create users, profiles and classroom memberships in bulk from a roster CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row (username is required)')
+        parser.add_argument(
+            '--classroom',
+            help='Enroll rows without a classroom column in this classroom (course code or slug)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Rows validated and written per transaction',
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Processes used to hash passwords (default: one per CPU)',
+        )
+
+    def handle(self, *args, **options):
+        classroom = None
+        if options['classroom']:
+            ref = options['classroom'].lower()
+            classroom = Classroom.objects.filter(course_code=ref).first() or Classroom.objects.filter(slug=ref).first()
+            if classroom is None:
+                raise CommandError(f"Unknown classroom '{options['classroom']}'.")
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.rows} rows: {result.created_users} created, {result.existing_users} existing, '
+                f'{result.enrolled} enrolled, {len(result.errors)} errors'
+            )
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+                result = import_roster(
+                    stream, classroom,
+                    batch_size=options['batch_size'], workers=options['workers'], progress=progress,
+                )
+        except (OSError, UnicodeDecodeError, RosterError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f'Line {error.line} ({error.username or "no username"}): {error.message}')
+        style = self.style.WARNING if result.errors else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Imported {result.created_users} new users and {result.enrolled} memberships '
+            f'from {result.rows} rows ({len(result.errors)} rows skipped).'
+        ))
@@ -42,6 +42,13 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin user listing, optionally filtered by role
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_idx'),
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+        ]
+    
     @property
     def is_admin(self):
         return self.role == self.Role.ADMIN
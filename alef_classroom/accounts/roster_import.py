@@ -0,0 +1,270 @@
+"""
+Bulk roster import from CSV.
+
+The file is read as a stream and handled BATCH_SIZE rows at a time. Each
+batch is validated with one query for existing usernames and one for the
+classrooms it names. Its passwords are hashed across a process pool, and
+it is written in a single transaction: bulk inserts of the users, their
+profiles and their memberships. The work of the post_save handlers that
+bulk_create skips is then done once per batch: profile creation, member
+counters, to-do rows and dashboard versions.
+
+Columns (only username is required):
+    username, email, first_name, last_name, role (student or teacher),
+    password, classroom (course code or slug), student_id, grade_level,
+    department
+
+Existing usernames are not changed, but are still enrolled in the
+classroom on their row, in the role of their account; a membership that
+was deactivated (by a roster sync) is reactivated. Rows without a
+password get an unusable one, so those users cannot log in until a
+password is set for them.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from assignment.pending import rebuild_pending_assignments
+from classroom.counters import rebuild_member_counts
+from classroom.models import Classroom, ClassroomMember
+from core.versions import bump_classroom_versions, bump_user_versions
+from .models import StudentProfile, TeacherProfile, User
+
+BATCH_SIZE = 1000
+ROLES = {'': User.Role.STUDENT, 'student': User.Role.STUDENT, 'teacher': User.Role.TEACHER}
+USER_FIELDS = ('email', 'first_name', 'last_name')
+PROFILE_FIELDS = {
+    User.Role.STUDENT: (StudentProfile, ('student_id', 'grade_level')),
+    User.Role.TEACHER: (TeacherProfile, ('department',)),
+}
+
+
+class RosterError(Exception):
+    """The file cannot be imported at all (as opposed to a bad row)."""
+
+
+@dataclass
+class RowError:
+    line: int
+    username: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created_users: int = 0
+    existing_users: int = 0
+    enrolled: int = 0
+    errors: list = field(default_factory=list)
+
+
+@dataclass
+class _Row:
+    line: int
+    username: str
+    role: str
+    values: dict
+    classroom_ref: str
+
+
+def _max_length(model, name):
+    return model._meta.get_field(name).max_length
+
+
+def _check_row(line, data):
+    """Return a _Row for one CSV row, or raise ValidationError."""
+    username = (data.get('username') or '').strip()
+    if not username:
+        raise ValidationError("Username is required.")
+    User.username_validator(username)
+    if len(username) > _max_length(User, 'username'):
+        raise ValidationError("Username is too long.")
+
+    role = ROLES.get((data.get('role') or '').strip().lower())
+    if role is None:
+        raise ValidationError("Role must be student or teacher.")
+
+    values = {name: (data.get(name) or '').strip() for name in USER_FIELDS + ('password',)}
+    if values['email']:
+        validate_email(values['email'])
+    profile_model, profile_fields = PROFILE_FIELDS[role]
+    for name in profile_fields:
+        values[name] = (data.get(name) or '').strip()
+    for model, names in ((User, USER_FIELDS), (profile_model, profile_fields)):
+        for name in names:
+            if len(values[name]) > _max_length(model, name):
+                raise ValidationError(f"{name.replace('_', ' ').capitalize()} is too long.")
+    if values['password']:
+        validate_password(values['password'], User(username=username, email=values['email']))
+
+    return _Row(line, username, role, values, (data.get('classroom') or '').strip())
+
+
+def _classrooms_for(refs):
+    """{course code or slug: classroom id} for the given references, in one query."""
+    refs = {ref.lower() for ref in refs if ref}
+    if not refs:
+        return {}
+    found = {}
+    for pk, course_code, slug in Classroom.objects.filter(
+        Q(course_code__in=refs) | Q(slug__in=refs)
+    ).values_list('pk', 'course_code', 'slug'):
+        found[course_code] = found[slug] = pk
+    return found
+
+
+def _hash_passwords(passwords, executor, workers):
+    """Hash non-empty passwords on the pool; empty ones become unusable passwords."""
+    hashed = [None if password else make_password(None) for password in passwords]
+    todo = [i for i, password in enumerate(passwords) if password]
+    if todo:
+        chunksize = max(1, len(todo) // (workers * 4))
+        for i, value in zip(todo, executor.map(make_password, [passwords[i] for i in todo], chunksize=chunksize)):
+            hashed[i] = value
+    return hashed
+
+
+def _import_batch(rows, default_classroom, executor, workers, result):
+    # username -> role of the accounts that already exist
+    existing = dict(User.objects.filter(username__in=[row.username for row in rows]).values_list('username', 'role'))
+    classrooms = _classrooms_for(row.classroom_ref for row in rows)
+
+    valid = []
+    for row in rows:
+        classroom_id = default_classroom.pk if default_classroom else None
+        if row.classroom_ref:
+            classroom_id = classrooms.get(row.classroom_ref.lower())
+            if classroom_id is None:
+                result.errors.append(RowError(row.line, row.username, f"Unknown classroom '{row.classroom_ref}'."))
+                continue
+        valid.append((row, classroom_id))
+    if not valid:
+        return
+
+    new_rows = [row for row, _ in valid if row.username not in existing]
+    passwords = _hash_passwords([row.values['password'] for row in new_rows], executor, workers)
+
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [
+                User(
+                    username=row.username,
+                    password=password,
+                    role=row.role,
+                    **{name: row.values[name] for name in USER_FIELDS},
+                )
+                for row, password in zip(new_rows, passwords)
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        user_ids = dict(User.objects.filter(username__in=[row.username for row, _ in valid]).values_list('username', 'pk'))
+
+        # What create_user_profile would do, with the profile columns filled in
+        for role, (model, names) in PROFILE_FIELDS.items():
+            model.objects.bulk_create(
+                [
+                    model(user_id=user_ids[row.username], **{name: row.values[name] or None for name in names})
+                    for row in new_rows
+                    if row.role == role and row.username in user_ids
+                ],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+
+        # Existing accounts join in their own role, not the row's
+        wanted = {
+            (classroom_id, user_ids[row.username]): existing.get(row.username, row.role)
+            for row, classroom_id in valid
+            if classroom_id is not None and row.username in user_ids
+        }
+        classroom_ids = {classroom_id for classroom_id, _ in wanted}
+        # (classroom id, user id) -> (membership pk, is_active)
+        enrolled = {
+            (classroom_id, user_id): (pk, is_active)
+            for pk, classroom_id, user_id, is_active in ClassroomMember.objects.filter(
+                classroom_id__in=classroom_ids, user_id__in={user_id for _, user_id in wanted}
+            ).values_list('pk', 'classroom_id', 'user_id', 'is_active')
+        }
+        members = [
+            ClassroomMember(classroom_id=classroom_id, user_id=user_id, role=role)
+            for (classroom_id, user_id), role in wanted.items()
+            if (classroom_id, user_id) not in enrolled
+        ]
+        ClassroomMember.objects.bulk_create(members, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # Deactivated memberships come back, as enroll() does on joining
+        reactivated = [
+            ClassroomMember(pk=enrolled[key][0], classroom_id=key[0], user_id=key[1], role=role, is_active=True)
+            for key, role in wanted.items()
+            if key in enrolled and not enrolled[key][1]
+        ]
+        ClassroomMember.objects.bulk_update(reactivated, ['role', 'is_active'], batch_size=BATCH_SIZE)
+
+        # What the ClassroomMember post_save handlers would do
+        changed = members + reactivated
+        if changed:
+            touched = {member.classroom_id for member in changed}
+            rebuild_member_counts(touched)
+            rebuild_pending_assignments({member.user_id for member in changed if member.role == ClassroomMember.Role.STUDENT})
+            bump_classroom_versions(touched)
+            # New users have no cached version yet, which already reads as changed
+            existing_ids = {user_ids[username] for username in existing if username in user_ids}
+            bump_user_versions({member.user_id for member in changed if member.user_id in existing_ids})
+
+    result.created_users += len(new_rows)
+    result.existing_users += len(valid) - len(new_rows)
+    result.enrolled += len(changed)
+
+
+def import_roster(stream, classroom=None, batch_size=BATCH_SIZE, workers=None, progress=None):
+    """
+    Import users from a text stream of CSV. Rows without a classroom column
+    are enrolled in classroom, if given. progress, if given, is called with
+    the running ImportResult after each batch. Raises RosterError when the
+    file has no username column.
+    """
+    reader = csv.DictReader(stream)
+    fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    if 'username' not in fieldnames:
+        raise RosterError("The CSV file needs a header row with a username column.")
+    reader.fieldnames = fieldnames
+
+    result = ImportResult()
+    seen = {}
+    workers = workers or os.cpu_count() or 1
+    # Worker processes only start once there is a password to hash
+    with ProcessPoolExecutor(workers, initializer=django.setup) as executor:
+        batch = []
+        for data in reader:
+            result.rows += 1
+            line = reader.line_num
+            try:
+                row = _check_row(line, data)
+            except ValidationError as e:
+                result.errors.append(RowError(line, (data.get('username') or '').strip(), ' '.join(e.messages)))
+                continue
+            if row.username in seen:
+                result.errors.append(RowError(line, row.username, f"Duplicate of line {seen[row.username]}."))
+                continue
+            seen[row.username] = line
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _import_batch(batch, classroom, executor, workers, result)
+                batch = []
+                if progress:
+                    progress(result)
+        if batch:
+            _import_batch(batch, classroom, executor, workers, result)
+            if progress:
+                progress(result)
+    return result
@@ -13,7 +13,9 @@ from .forms import (
     CustomAuthenticationForm
 )
 from .models import User, TeacherProfile, StudentProfile
+from core.retry import retry_on_locked
 
+@retry_on_locked
 def register(request):
     """
     User registration view.
@@ -33,6 +35,7 @@ def register(request):
     return render(request, 'accounts/register.html', {'form': form})
 
 
+@retry_on_locked
 def user_login(request):
     """
     User login view.
@@ -100,6 +103,7 @@ def user_detail(request, username):
     return render(request, 'accounts/user_detail.html', context)
 
 @login_required
+@retry_on_locked
 def profile(request):
     """
     User profile view with role-specific profile editing.
@@ -1,14 +1,17 @@
 from django.contrib import admin
-from .models import Assignment, AssignmentSubmission, Comment
+from core.search import FullTextSearchAdminMixin
+from .models import Assignment, AssignmentSubmission, Comment, SubmissionIntent
 
 @admin.register(Assignment)
-class AssignmentAdmin(admin.ModelAdmin):
+class AssignmentAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """
     Admin for assignments - allows viewing and managing all assignments.
     """
     list_display = ('title', 'classroom', 'created_by', 'due_date', 'is_published', 'is_draft', 'submission_count', 'graded_count')
     list_filter = ('is_published', 'is_draft', 'classroom', 'created_at', 'due_date')
-    search_fields = ('title', 'description', 'classroom__name', 'created_by__username')
+    # Titles and text are searched through the full-text index
+    search_fields = ('=classroom__name', '=created_by__username')
+    fulltext_fallback_fields = ('title', 'description')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'due_date'
     fieldsets = (
@@ -35,14 +38,18 @@ class AssignmentAdmin(admin.ModelAdmin):
     )
     ordering = ('-created_at',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('classroom', 'created_by').with_submission_counts()
+
 @admin.register(AssignmentSubmission)
-class AssignmentSubmissionAdmin(admin.ModelAdmin):
+class AssignmentSubmissionAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """
     Admin for submissions - allows viewing and managing all submissions.
     """
     list_display = ('student', 'assignment', 'submitted_at', 'is_late', 'is_graded', 'points_earned', 'graded_by')
     list_filter = ('is_graded', 'is_late', 'assignment', 'submitted_at')
-    search_fields = ('student__username', 'assignment__title', 'feedback')
+    search_fields = ('=student__username', '=assignment__title')
+    fulltext_fallback_fields = ('content', 'feedback')
     readonly_fields = ('submitted_at', 'updated_at', 'graded_at')
     date_hierarchy = 'submitted_at'
     fieldsets = (
@@ -62,14 +69,31 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
     )
     ordering = ('-submitted_at',)
 
+@admin.register(SubmissionIntent)
+class SubmissionIntentAdmin(admin.ModelAdmin):
+    """
+    Admin for queued submissions - read-only log of what was received and when.
+    """
+    list_display = ('student', 'assignment', 'received_at', 'is_late', 'status', 'processed_at')
+    list_filter = ('status', 'is_late', 'received_at')
+    search_fields = ('student__username', 'assignment__title')
+    readonly_fields = ('assignment', 'student', 'content', 'attachment', 'received_at', 'is_late',
+                       'status', 'submission', 'processed_at')
+    date_hierarchy = 'received_at'
+    ordering = ('-received_at',)
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """
     Admin for assignment comments - allows viewing and managing all comments.
     """
     list_display = ('author', 'assignment', 'submission', 'created_at')
     list_filter = ('assignment', 'submission', 'created_at')
-    search_fields = ('content', 'author__username')
+    search_fields = ('=author__username',)
+    fulltext_fallback_fields = ('content',)
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'created_at'
     fieldsets = (
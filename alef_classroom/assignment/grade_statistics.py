@@ -0,0 +1,323 @@
+"""
+Grade statistics and curves, computed with NumPy.
+
+Graded scores are read with one values_list query straight into a
+structured array, never as model instances. Summaries, z-scores,
+percentile ranks and curves are then whole-array operations, so tens of
+thousands of scores are handled in one pass. A curve is written back with
+a single bulk_update in one transaction. The grade events it publishes
+also tell the students and bump their dashboard versions.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from core import activity
+from .models import Assignment, AssignmentSubmission
+
+HISTOGRAM_BINS = 10
+PERCENTILES = (10, 25, 50, 75, 90)
+BATCH_SIZE = 500
+
+SCORE_DTYPE = np.dtype([
+    ('pk', np.int64),
+    ('student_id', np.int64),
+    ('assignment_id', np.int64),
+    ('points', np.float64),
+    ('possible', np.float64),
+])
+
+
+def graded_scores(submissions):
+    """The graded scores of a submission queryset as a SCORE_DTYPE array."""
+    rows = submissions.filter(is_graded=True, points_earned__isnull=False).values_list(
+        'pk', 'student_id', 'assignment_id', 'points_earned', 'assignment__points_possible'
+    )
+    return np.fromiter(rows.iterator(chunk_size=2000), dtype=SCORE_DTYPE)
+
+
+def as_percent(points, possible):
+    """points / possible * 100, with 0 where nothing was possible."""
+    # A float output whatever the inputs: bincount over no scores gives int64
+    out = np.zeros(np.shape(points), dtype=float)
+    return np.divide(points * 100, possible, out=out, where=possible > 0)
+
+
+def z_scores(values):
+    if not values.size:
+        return np.zeros(0)
+    std = values.std()
+    if std == 0:
+        return np.zeros(values.shape)
+    return (values - values.mean()) / std
+
+
+def percentile_ranks(values):
+    """Percent of values below each value, counting ties as half below."""
+    if not values.size:
+        return np.zeros_like(values)
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side='left')
+    equal = np.searchsorted(ordered, values, side='right') - below
+    return (below + 0.5 * equal) * 100 / values.size
+
+
+@dataclass
+class Distribution:
+    """Summary of a set of scores; the histogram splits 0..top into HISTOGRAM_BINS bins."""
+    count: int = 0
+    mean: float = None
+    median: float = None
+    std: float = None
+    minimum: float = None
+    maximum: float = None
+    percentiles: dict = field(default_factory=dict)
+    histogram: list = field(default_factory=list)
+    top: float = 100
+
+    @classmethod
+    def of(cls, values, top=100):
+        if not values.size:
+            return cls(histogram=[0] * HISTOGRAM_BINS, top=top)
+        # Curved or extra-credit scores above the top go into the last bin
+        counts, _ = np.histogram(np.clip(values, 0, top), bins=HISTOGRAM_BINS, range=(0, top or 1))
+        return cls(
+            count=int(values.size),
+            mean=round(float(values.mean()), 2),
+            median=round(float(np.median(values)), 2),
+            std=round(float(values.std()), 2),
+            minimum=round(float(values.min()), 2),
+            maximum=round(float(values.max()), 2),
+            percentiles={
+                p: round(float(v), 2)
+                for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+            },
+            histogram=counts.tolist(),
+            top=top,
+        )
+
+    @property
+    def histogram_bins(self):
+        """(low, high, count, percent of the largest bin) for drawing the histogram."""
+        width = self.top / HISTOGRAM_BINS
+        largest = max(self.histogram, default=0) or 1
+        return [
+            (round(i * width, 2), round((i + 1) * width, 2), count, round(count * 100 / largest))
+            for i, count in enumerate(self.histogram)
+        ]
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'median': self.median,
+            'std': self.std,
+            'min': self.minimum,
+            'max': self.maximum,
+            'percentiles': {str(p): v for p, v in self.percentiles.items()},
+            'histogram': self.histogram,
+            'histogram_top': self.top,
+        }
+
+
+@dataclass
+class Standing:
+    """One student's score with where it falls in the group."""
+    student: object
+    points: float
+    possible: float
+    percent: float
+    z_score: float
+    percentile_rank: float
+
+    def as_dict(self):
+        return {
+            'student': self.student.username,
+            'points': self.points,
+            'possible': self.possible,
+            'percent': self.percent,
+            'z_score': self.z_score,
+            'percentile_rank': self.percentile_rank,
+        }
+
+
+def _standings(student_ids, points, possible):
+    """Standings ordered best first; z-scores and ranks come from the percentages."""
+    percent = as_percent(points, possible)
+    z = z_scores(percent)
+    ranks = percentile_ranks(percent)
+    users = get_user_model().objects.in_bulk(student_ids.tolist())
+    order = np.argsort(-percent, kind='stable')
+    return [
+        Standing(
+            users[student_id], round(p, 2), round(pp, 2), round(pc, 2), round(zz, 2), round(r, 1)
+        )
+        for student_id, p, pp, pc, zz, r in zip(
+            student_ids[order].tolist(), points[order].tolist(), possible[order].tolist(),
+            percent[order].tolist(), z[order].tolist(), ranks[order].tolist(),
+        )
+        if student_id in users
+    ]
+
+
+@dataclass
+class AssignmentStatistics:
+    assignment: Assignment
+    distribution: Distribution
+    standings: list
+
+    def as_dict(self):
+        return {
+            'assignment': self.assignment.pk,
+            'points_possible': self.assignment.points_possible,
+            'distribution': self.distribution.as_dict(),
+            'students': [standing.as_dict() for standing in self.standings],
+        }
+
+
+def assignment_statistics(assignment):
+    scores = graded_scores(AssignmentSubmission.objects.filter(assignment=assignment))
+    return AssignmentStatistics(
+        assignment,
+        Distribution.of(scores['points'], top=assignment.points_possible),
+        _standings(scores['student_id'], scores['points'], scores['possible']),
+    )
+
+
+@dataclass
+class ClassroomStatistics:
+    """Per-assignment distributions and each student's overall standing."""
+    assignments: list
+    overall: Distribution
+    standings: list
+
+    def as_dict(self):
+        return {
+            'assignments': [
+                {'assignment': assignment.pk, 'title': assignment.title,
+                 'points_possible': assignment.points_possible, 'distribution': distribution.as_dict()}
+                for assignment, distribution in self.assignments
+            ],
+            'overall': self.overall.as_dict(),
+            'students': [standing.as_dict() for standing in self.standings],
+        }
+
+
+def classroom_statistics(classroom):
+    """
+    Statistics over the graded work of the classroom's published
+    assignments. A student's overall percentage is their total points over
+    the points possible of the assignments graded for them.
+    """
+    assignments = list(
+        Assignment.objects.filter(classroom=classroom, is_published=True, is_draft=False)
+        .order_by('due_date', 'pk')
+    )
+    scores = graded_scores(AssignmentSubmission.objects.filter(assignment__in=assignments))
+
+    # Group by assignment: sort once, then split at the boundaries
+    scores = scores[np.argsort(scores['assignment_id'], kind='stable')]
+    ids, starts = np.unique(scores['assignment_id'], return_index=True)
+    groups = dict(zip(ids.tolist(), np.split(scores['points'], starts[1:])))
+    per_assignment = [
+        (assignment, Distribution.of(groups.get(assignment.pk, np.empty(0)), top=assignment.points_possible))
+        for assignment in assignments
+    ]
+
+    # Per-student totals
+    student_ids, inverse = np.unique(scores['student_id'], return_inverse=True)
+    points = np.bincount(inverse, weights=scores['points'], minlength=student_ids.size)
+    possible = np.bincount(inverse, weights=scores['possible'], minlength=student_ids.size)
+    return ClassroomStatistics(
+        per_assignment,
+        Distribution.of(as_percent(points, possible)),
+        _standings(student_ids, points, possible),
+    )
+
+
+@dataclass
+class Curve:
+    """
+    A curve over an assignment's scores: 'shift' adds amount points to
+    every score, 'sqrt' maps a score to sqrt(score / possible) * possible.
+    With clamp, results are kept within 0..points_possible.
+    """
+    SHIFT = 'shift'
+    SQRT = 'sqrt'
+    KINDS = [(SHIFT, 'Linear shift'), (SQRT, 'Square root')]
+
+    kind: str
+    amount: float = 0
+    clamp: bool = True
+
+    @classmethod
+    def from_data(cls, data):
+        """Build a curve from form data; raises ValueError with a message for the user."""
+        kind = data.get('curve')
+        if kind not in dict(cls.KINDS):
+            raise ValueError("Choose a curve.")
+        amount = 0
+        if kind == cls.SHIFT:
+            try:
+                amount = float(data.get('amount', ''))
+            except ValueError:
+                raise ValueError("Enter the number of points to add.")
+            if not np.isfinite(amount):
+                raise ValueError("Enter the number of points to add.")
+        return cls(kind, amount, clamp=bool(data.get('clamp')))
+
+    def apply(self, points, possible):
+        if self.kind == self.SHIFT:
+            curved = points + self.amount
+        else:
+            curved = np.sqrt(np.clip(as_percent(points, possible) / 100, 0, None)) * possible
+        if self.clamp:
+            curved = np.clip(curved, 0, possible)
+        return np.round(curved, 2)
+
+
+@dataclass
+class CurveResult:
+    before: Distribution
+    after: Distribution
+    changed: int
+
+
+def curve_assignment(assignment, curve, grader, commit=True):
+    """
+    Apply curve to the graded submissions of assignment. With commit the
+    changed scores are saved (stamped as graded by grader); otherwise this
+    only previews the resulting distribution.
+    """
+    with transaction.atomic():
+        scores = graded_scores(AssignmentSubmission.objects.filter(assignment=assignment))
+        curved = curve.apply(scores['points'], scores['possible'])
+        changed = scores[curved != scores['points']]
+        result = CurveResult(
+            Distribution.of(scores['points'], top=assignment.points_possible),
+            Distribution.of(curved, top=assignment.points_possible),
+            int(changed.size),
+        )
+        if not commit or not changed.size:
+            return result
+
+        now = timezone.now()
+        submissions = [
+            AssignmentSubmission(
+                pk=pk, assignment_id=assignment.pk, student_id=student_id, points_earned=points,
+                is_graded=True, graded_by_id=grader.pk, graded_at=now,
+            )
+            for pk, student_id, points in zip(
+                changed['pk'].tolist(), changed['student_id'].tolist(),
+                curved[curved != scores['points']].tolist(),
+            )
+        ]
+        AssignmentSubmission.objects.bulk_update(
+            submissions, ['points_earned', 'graded_by', 'graded_at'], batch_size=BATCH_SIZE
+        )
+        # bulk_update skips post_save; announce the new grades here
+        activity.record_grades(submissions)
+    return result
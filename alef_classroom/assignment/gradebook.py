@@ -0,0 +1,95 @@
+"""
+Student-by-assignment gradebook for a classroom.
+
+The rows are generated lazily for streaming. Assignments are loaded once
+as the columns. Students are read STUDENT_CHUNK at a time, and each chunk's
+submissions come from one query on the (assignment, student) index and
+are pivoted into rows. The number of queries is 2 + students / STUDENT_CHUNK,
+and memory holds at most one chunk of cells whatever the class size.
+"""
+from django.utils import timezone
+
+from classroom.models import ClassroomMember
+from .models import Assignment, AssignmentSubmission
+
+STUDENT_CHUNK = 200
+
+# Cell markers; graded cells hold the points earned
+MISSING = 'missing'
+UNGRADED = 'ungraded'
+LATE_SUFFIX = ' (late)'
+
+
+def gradebook_assignments(classroom):
+    """The gradebook's columns: published assignments, oldest due date first."""
+    return list(
+        Assignment.objects.filter(classroom=classroom, is_published=True, is_draft=False)
+        .order_by('due_date', 'pk')
+        .only('pk', 'title', 'due_date', 'points_possible')
+    )
+
+
+def gradebook_header(assignments):
+    return (
+        ['Username', 'Name']
+        + [f'{assignment.title} ({assignment.points_possible})' for assignment in assignments]
+        + ['Total', 'Possible', 'Missing', 'Late']
+    )
+
+
+def _student_chunks(classroom):
+    members = (
+        ClassroomMember.objects.filter(
+            classroom=classroom, role=ClassroomMember.Role.STUDENT, is_active=True
+        )
+        .select_related('user')
+        .order_by('user__username', 'pk')
+    )
+    chunk = []
+    for member in members.iterator(chunk_size=STUDENT_CHUNK):
+        chunk.append(member.user)
+        if len(chunk) >= STUDENT_CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _cell(submission, assignment, now):
+    """The cell text and whether it counts as missing or late."""
+    if submission is None:
+        # Not submitted yet is only missing once the assignment is due
+        return (MISSING, True, False) if assignment.due_date < now else ('', False, False)
+    points_earned, is_graded, is_late = submission
+    text = f'{points_earned:g}' if is_graded and points_earned is not None else UNGRADED
+    return (text + LATE_SUFFIX if is_late else text), False, is_late
+
+
+def gradebook_rows(classroom, assignments):
+    """Yield one row per active student, in the order of gradebook_header."""
+    assignment_ids = [assignment.pk for assignment in assignments]
+    now = timezone.now()
+    for students in _student_chunks(classroom):
+        submissions = {}
+        if assignment_ids:
+            rows = AssignmentSubmission.objects.filter(
+                assignment_id__in=assignment_ids,
+                student_id__in=[student.pk for student in students],
+            ).values_list('student_id', 'assignment_id', 'points_earned', 'is_graded', 'is_late')
+            for student_id, assignment_id, *submission in rows:
+                submissions[student_id, assignment_id] = submission
+        for student in students:
+            cells = []
+            total = possible = missing = late = 0
+            for assignment in assignments:
+                submission = submissions.get((student.pk, assignment.pk))
+                text, is_missing, is_late = _cell(submission, assignment, now)
+                cells.append(text)
+                missing += is_missing
+                late += is_late
+                if submission is not None and submission[1] and submission[0] is not None:
+                    total += submission[0]
+                    possible += assignment.points_possible
+                elif is_missing:
+                    possible += assignment.points_possible
+            yield [student.username, student.get_full_name(), *cells, f'{total:g}', possible, missing, late]
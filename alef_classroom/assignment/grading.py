@@ -0,0 +1,96 @@
+"""
+Bulk grading for the grading grid.
+
+All rows posted from the grid are validated in one pass; the valid,
+changed ones are written with a single bulk_update in one transaction,
+graded_by and graded_at included. Rows with errors keep the values that
+were entered so the teacher can fix them without retyping the rest.
+bulk_update skips post_save, so the grade events (which also bump the
+students' dashboard versions) and search index entries are written here
+for the whole batch.
+"""
+import math
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from core import activity, search
+from .models import AssignmentSubmission
+
+GRADE_FIELDS = ['points_earned', 'feedback', 'is_graded', 'graded_by', 'graded_at']
+
+
+@dataclass
+class GradeRow:
+    """One submission in the grading grid, with the values shown in its inputs."""
+    submission: AssignmentSubmission
+    points: str
+    feedback: str
+    error: str = ''
+
+    @classmethod
+    def from_submission(cls, submission):
+        points = '' if submission.points_earned is None else f'{submission.points_earned:g}'
+        return cls(submission, points, submission.feedback or '')
+
+
+def grid_rows(submissions):
+    return [GradeRow.from_submission(submission) for submission in submissions]
+
+
+def parse_points(value, points_possible):
+    """Return (points, error) for the text entered in a points cell."""
+    try:
+        points = float(value)
+    except ValueError:
+        return None, "Enter a number."
+    if not math.isfinite(points) or points < 0 or points > points_possible:
+        return None, f"Enter a value between 0 and {points_possible}."
+    return points, ''
+
+
+def apply_grades(assignment, submissions, data, grader):
+    """
+    Grade submissions from the posted grid data (points-<id> and
+    feedback-<id> fields). Rows whose points are left blank, or whose
+    values did not change, are skipped. Returns (rows, graded) where rows
+    are the GradeRows to show again and graded the submissions written.
+    """
+    rows = []
+    changed = []
+    for submission in submissions:
+        points_key, feedback_key = f'points-{submission.pk}', f'feedback-{submission.pk}'
+        if points_key not in data:
+            rows.append(GradeRow.from_submission(submission))
+            continue
+        row = GradeRow(submission, data[points_key].strip(), data.get(feedback_key, '').strip())
+        rows.append(row)
+        if not row.points:
+            if submission.is_graded:
+                row.error = "Grades cannot be removed here; enter the points."
+            continue
+        points, row.error = parse_points(row.points, assignment.points_possible)
+        if row.error:
+            continue
+        if submission.is_graded and points == submission.points_earned and row.feedback == (submission.feedback or ''):
+            continue
+        changed.append((submission, points, row.feedback))
+
+    now = timezone.now()
+    graded = []
+    for submission, points, feedback in changed:
+        submission.points_earned = points
+        submission.feedback = feedback
+        submission.is_graded = True
+        submission.graded_by = grader
+        submission.graded_at = now
+        submission.assignment = assignment
+        graded.append(submission)
+    if graded:
+        with transaction.atomic():
+            AssignmentSubmission.objects.bulk_update(graded, GRADE_FIELDS)
+            # What the submission post_save receivers would do
+            activity.record_grades(graded)
+            search.index_objects(graded)
+    return rows, graded
@@ -0,0 +1,132 @@
+"""
+Queued submission ingestion for deadline rushes.
+
+With SUBMISSION_INGESTION_MODE = 'queued', submission_create only inserts a
+SubmissionIntent stamped with the time it was received, and whether that
+was late, and returns. A single writer (the ingest_submissions command)
+turns pending intents into submissions in batches: one transaction per
+batch instead of several per student. The to-do, activity feed,
+dashboard, search index and similarity updates that the model signals
+would make are done once per batch as well. Lateness is decided at
+receipt, so time spent in the queue never makes a submission late.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core import activity, search
+from core.versions import bump_user_versions
+from .models import AssignmentSubmission, SubmissionIntent
+from . import pending, similarity
+
+BATCH_SIZE = 200
+
+
+def queued_ingestion():
+    return settings.SUBMISSION_INGESTION_MODE == 'queued'
+
+
+def pending_intent(assignment, student):
+    """The student's submission for the assignment that is still queued, if any."""
+    return SubmissionIntent.objects.filter(
+        assignment=assignment, student=student, status=SubmissionIntent.Status.PENDING
+    ).first()
+
+
+def receive(assignment, student, content, attachment=None, received_at=None):
+    """
+    Record a submission intent received at received_at (default: now).
+    Returns (intent, created); a student who already has one queued for
+    the assignment gets that one back. intent is None when the queued one
+    was ingested between the failed insert and the lookup: the student's
+    earlier submission has been received either way.
+    """
+    received_at = received_at or timezone.now()
+    intent = SubmissionIntent(
+        assignment=assignment,
+        student=student,
+        content=content,
+        attachment=attachment,
+        received_at=received_at,
+        is_late=received_at > assignment.due_date,
+    )
+    try:
+        with transaction.atomic():
+            intent.save()
+    except IntegrityError:
+        return pending_intent(assignment, student), False
+    return intent, True
+
+
+def ingest_batch(batch_size=BATCH_SIZE):
+    """
+    Commit up to batch_size pending intents, oldest first, in one
+    transaction. Intents for assignments the student has already submitted
+    are marked as duplicates. Returns the number of intents processed.
+    """
+    with transaction.atomic():
+        intents = list(
+            SubmissionIntent.objects.filter(status=SubmissionIntent.Status.PENDING)
+            .select_related('assignment').order_by('pk')[:batch_size]
+        )
+        if not intents:
+            return 0
+        submitted = set(AssignmentSubmission.objects.filter(
+            assignment_id__in={intent.assignment_id for intent in intents},
+            student_id__in={intent.student_id for intent in intents},
+        ).values_list('assignment_id', 'student_id'))
+
+        now = timezone.now()
+        submissions = []
+        for intent in intents:
+            intent.processed_at = now
+            key = (intent.assignment_id, intent.student_id)
+            if key in submitted:
+                intent.status = SubmissionIntent.Status.DUPLICATE
+                continue
+            submitted.add(key)
+            intent.status = SubmissionIntent.Status.COMMITTED
+            intent.submission = AssignmentSubmission(
+                assignment=intent.assignment,
+                student_id=intent.student_id,
+                content=intent.content,
+                attachment=intent.attachment.name or None,
+                is_late=intent.is_late,
+                submitted_at=intent.received_at,
+            )
+            submissions.append(intent.submission)
+
+        AssignmentSubmission.objects.bulk_create(submissions)
+        for intent in intents:
+            if intent.submission is not None:
+                intent.submission_id = intent.submission.pk
+        SubmissionIntent.objects.bulk_update(intents, ['status', 'processed_at', 'submission'])
+
+        # bulk_create skips post_save: do what the submission signals would
+        pending.remove_submitted(submissions)
+        activity.record_submissions(submissions)
+        search.index_objects(submissions)
+        bump_user_versions({submission.student_id for submission in submissions})
+    # Hashing a batch takes far longer than writing it: do it after releasing
+    # the write lock. A signature lost to a crash here is filled in by
+    # find_similar_submissions, which computes missing ones first.
+    similarity.update_signatures(submissions)
+    return len(intents)
+
+
+def ingest_pending(batch_size=BATCH_SIZE):
+    """Process batches until the queue is empty; return the number of intents processed."""
+    processed = 0
+    while count := ingest_batch(batch_size):
+        processed += count
+    return processed
+
+
+def queue_stats():
+    """Pending intents and how long the oldest one has been waiting."""
+    queued = SubmissionIntent.objects.filter(status=SubmissionIntent.Status.PENDING)
+    oldest = queued.order_by('pk').values_list('received_at', flat=True).first()
+    return {
+        'pending': queued.count(),
+        'oldest_age_seconds': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0,
+    }
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from assignment.models import Assignment, AssignmentSubmission
+from assignment.similarity import SIMILARITY_THRESHOLD, backfill_signatures, similar_pairs
+
+
+class Command(BaseCommand):
+    help = "Report near-duplicate submissions (MinHash/LSH) across assignments, classrooms or a term"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--classroom', type=int, action='append', dest='classrooms',
+            help='Only check assignments in this classroom id (may be repeated)',
+        )
+        parser.add_argument(
+            '--assignment', type=int, action='append', dest='assignments',
+            help='Only check this assignment id (may be repeated)',
+        )
+        parser.add_argument(
+            '--since', help='Only check assignments due on or after this date (YYYY-MM-DD), e.g. the start of a term',
+        )
+        parser.add_argument(
+            '--until', help='Only check assignments due on or before this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=SIMILARITY_THRESHOLD,
+            help=f'Minimum estimated similarity to report (default: {SIMILARITY_THRESHOLD})',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Recompute every signature instead of only the missing ones',
+        )
+
+    def handle(self, *args, **options):
+        assignments = Assignment.objects.all()
+        if options['classrooms']:
+            assignments = assignments.filter(classroom_id__in=options['classrooms'])
+        if options['assignments']:
+            assignments = assignments.filter(pk__in=options['assignments'])
+        for option, lookup in (('since', 'due_date__date__gte'), ('until', 'due_date__date__lte')):
+            if options[option]:
+                day = parse_date(options[option])
+                if day is None:
+                    raise CommandError(f'--{option} must be a date in YYYY-MM-DD format.')
+                assignments = assignments.filter(**{lookup: day})
+        titles = dict(assignments.values_list('pk', 'title'))
+
+        written = backfill_signatures(
+            AssignmentSubmission.objects.filter(assignment_id__in=titles.keys()),
+            rebuild=options['rebuild'],
+        )
+        pairs = similar_pairs(titles.keys(), threshold=options['threshold'])
+
+        submission_ids = {pair.first_id for pair in pairs} | {pair.second_id for pair in pairs}
+        students = dict(AssignmentSubmission.objects.filter(
+            pk__in=submission_ids
+        ).values_list('pk', 'student__username'))
+        for pair in pairs:
+            self.stdout.write(
+                f'{pair.percent:3d}%  {titles[pair.assignment_id]}: '
+                f'{students[pair.first_id]} (#{pair.first_id}) and {students[pair.second_id]} (#{pair.second_id})'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {len(titles)} assignments ({written} signatures computed); {len(pairs)} similar pairs.'
+        ))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from assignment.ingestion import BATCH_SIZE, ingest_batch, ingest_pending
+
+
+class Command(BaseCommand):
+    help = "Commit queued submissions in batches (the single writer for SUBMISSION_INGESTION_MODE=queued)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Intents committed per transaction',
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running and poll for new intents instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0.5,
+            help='Seconds to wait between polls of an empty queue with --watch',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if not options['watch']:
+            processed = ingest_pending(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} submission intents.'))
+            return
+
+        self.stdout.write(f'Watching the submission queue (batch size {batch_size}).')
+        try:
+            while True:
+                # Honour CONN_MAX_AGE and connection health checks in this long-running process
+                close_old_connections()
+                try:
+                    processed = ingest_batch(batch_size)
+                except DatabaseError as e:
+                    # The batch was rolled back and stays queued
+                    self.stderr.write(self.style.ERROR(f'Batch failed, retrying: {e}'))
+                    processed = 0
+                if processed:
+                    self.stdout.write(f'Processed {processed} submission intents.')
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
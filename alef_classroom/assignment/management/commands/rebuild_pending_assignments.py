@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from assignment.pending import rebuild_pending_assignments
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized per-student to-do (pending assignment) table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student', type=int, action='append', dest='students',
+            help='Only rebuild entries for this user id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_pending_assignments(options['students'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} pending assignment entries.'))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['classroom', '-created_at'], name='assignment_classroom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('is_draft', False), ('is_published', True)), fields=['classroom', '-created_at'], name='assignment_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['created_by', '-created_at'], name='assignment_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(condition=models.Q(('is_graded', True)), fields=['student', '-graded_at'], name='submission_student_graded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['assignment', '-submitted_at'], name='submission_assignment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='submission_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(condition=models.Q(('is_graded', False)), fields=['-submitted_at', '-id'], name='submission_ungraded_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+import django.db.models.deletion
+
+
+def populate_pending_assignments(apps, schema_editor):
+    ClassroomMember = apps.get_model('classroom', 'ClassroomMember')
+    AssignmentSubmission = apps.get_model('assignment', 'AssignmentSubmission')
+    PendingAssignment = apps.get_model('assignment', 'PendingAssignment')
+    submitted = AssignmentSubmission.objects.filter(
+        assignment_id=OuterRef('classroom__assignments__id'),
+        student_id=OuterRef('user_id'),
+    )
+    pairs = ClassroomMember.objects.filter(
+        role='STUDENT',
+        is_active=True,
+        classroom__assignments__is_published=True,
+        classroom__assignments__is_draft=False,
+    ).annotate(submitted=Exists(submitted)).filter(submitted=False).order_by().values_list(
+        'user_id', 'classroom__assignments__id', 'classroom_id', 'classroom__assignments__due_date'
+    )
+    PendingAssignment.objects.bulk_create(
+        (
+            PendingAssignment(student_id=student_id, assignment_id=assignment_id,
+                              classroom_id=classroom_id, due_date=due_date)
+            for student_id, assignment_id, classroom_id, due_date in pairs.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0003_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assignment', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateTimeField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_entries', to='assignment.assignment')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_entries', to='classroom.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_assignments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['due_date'],
+                'indexes': [models.Index(fields=['student', 'due_date', 'id'], name='pending_student_due_idx')],
+                'unique_together': {('student', 'assignment')},
+            },
+        ),
+        migrations.RunPython(populate_pending_assignments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:06
+
+import assignment.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assignment', '0003_pending_assignment'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignmentsubmission',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='SubmissionIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField(blank=True, null=True)),
+                ('attachment', models.FileField(blank=True, null=True, upload_to=assignment.models.get_submission_file_path)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_late', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('committed', 'Committed'), ('duplicate', 'Duplicate')], default='pending', max_length=20)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_intents', to='assignment.assignment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_intents', to=settings.AUTH_USER_MODEL)),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intents', to='assignment.assignmentsubmission')),
+            ],
+            options={
+                'ordering': ['received_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='intent_queue_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='submissionintent',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('assignment', 'student'), name='intent_one_pending_uniq'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0004_submission_intent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSignature',
+            fields=[
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='assignment.assignmentsubmission')),
+                ('minhash', models.BinaryField()),
+                ('shingle_count', models.PositiveIntegerField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_signatures', to='assignment.assignment')),
+            ],
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from classroom.models import Classroom
 import uuid
 import os
@@ -16,6 +17,18 @@ def get_submission_file_path(instance, filename):
     filename = f"{uuid.uuid4()}.{ext}"
     return os.path.join('assignments/submissions/', filename)
 
+class AssignmentQuerySet(models.QuerySet):
+    def with_submission_counts(self):
+        """
+        Annotate each assignment with its submission and graded counts so that
+        submission_count and graded_count do not run a query per row.
+        """
+        return self.annotate(
+            num_submissions=models.Count('submissions'),
+            num_graded=models.Count('submissions', filter=models.Q(submissions__is_graded=True)),
+        )
+
+
 class Assignment(models.Model):
     """
     Model representing an assignment in a classroom.
@@ -47,18 +60,36 @@ class Assignment(models.Model):
     allow_late_submissions = models.BooleanField(default=True)
     late_penalty_percentage = models.PositiveIntegerField(default=0)  # Percentage penalty for late submissions
     
+    objects = AssignmentQuerySet.as_manager()
+    
     def __str__(self):
         return self.title
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Teacher assignment lists and dashboards: filter by classroom, newest first
+            models.Index(fields=['classroom', '-created_at'], name='assignment_classroom_idx'),
+            # Student-visible assignments only
+            models.Index(
+                fields=['classroom', '-created_at'],
+                condition=models.Q(is_published=True, is_draft=False),
+                name='assignment_visible_idx',
+            ),
+            models.Index(fields=['created_by', '-created_at'], name='assignment_creator_idx'),
+        ]
         
     @property
     def submission_count(self):
+        # Prefer the value annotated by with_submission_counts()
+        if hasattr(self, 'num_submissions'):
+            return self.num_submissions
         return self.submissions.count()
     
     @property
     def graded_count(self):
+        if hasattr(self, 'num_graded'):
+            return self.num_graded
         return self.submissions.filter(is_graded=True).count()
 
 
@@ -76,7 +107,8 @@ class AssignmentSubmission(models.Model):
         on_delete=models.CASCADE,
         related_name='submissions'
     )
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: queued submissions keep the time they were received
+    submitted_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     content = models.TextField(blank=True, null=True)
     attachment = models.FileField(
@@ -103,6 +135,61 @@ class AssignmentSubmission(models.Model):
     class Meta:
         unique_together = ['assignment', 'student']
         ordering = ['-submitted_at']
+        indexes = [
+            # A student's recent grades
+            models.Index(
+                fields=['student', '-graded_at'],
+                condition=models.Q(is_graded=True),
+                name='submission_student_graded_idx',
+            ),
+            # Submission lists per assignment (and teachers' recent submissions via the assignment join)
+            models.Index(fields=['assignment', '-submitted_at'], name='submission_assignment_idx'),
+            # Site-wide submission listing
+            models.Index(fields=['-submitted_at', '-id'], name='submission_submitted_idx'),
+            # Grading queue: only ungraded submissions are indexed
+            models.Index(
+                fields=['-submitted_at', '-id'],
+                condition=models.Q(is_graded=False),
+                name='submission_ungraded_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored grading time and text so post_save handlers
+        # can tell when a save grades the submission or changes its text
+        loaded = dict(zip(field_names, values))
+        instance._loaded_graded_at = loaded.get('graded_at')
+        if 'content' in loaded:
+            instance._loaded_content = loaded['content']
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_graded_at = self.graded_at
+        self._loaded_content = self.content
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_graded_at = self.graded_at
+        self._loaded_content = self.content
+    
+    def content_changed(self):
+        """
+        Whether the last save created the submission or changed its text.
+        Only meaningful inside post_save handlers.
+        """
+        if not hasattr(self, '_loaded_content'):
+            return True
+        return self._loaded_content != self.content
+    
+    def grade_changed(self):
+        """
+        Whether the last save graded the submission. Only meaningful inside
+        post_save handlers.
+        """
+        return self.is_graded and self.graded_at is not None and self.graded_at != getattr(self, '_loaded_graded_at', None)
 
     @property
     def is_on_time(self):
@@ -113,6 +200,93 @@ class AssignmentSubmission(models.Model):
         return bool(self.attachment)
 
 
+class SubmissionIntent(models.Model):
+    """
+    A submission received in queued ingestion mode, recorded with a single
+    insert and turned into an AssignmentSubmission later by the
+    ingest_submissions writer (see assignment.ingestion). Rows are kept as
+    a log of what was received and when.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        COMMITTED = 'committed', 'Committed'
+        DUPLICATE = 'duplicate', 'Duplicate'
+
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='submission_intents'
+    )
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='submission_intents'
+    )
+    content = models.TextField(blank=True, null=True)
+    attachment = models.FileField(
+        upload_to=get_submission_file_path,
+        blank=True,
+        null=True
+    )
+    # Lateness is decided when the submission is received, not when it is committed
+    received_at = models.DateTimeField(default=timezone.now)
+    is_late = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    submission = models.ForeignKey(
+        AssignmentSubmission,
+        on_delete=models.SET_NULL,
+        related_name='intents',
+        null=True,
+        blank=True
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Submission intent {self.pk} by {self.student_id} for {self.assignment_id}"
+    
+    class Meta:
+        ordering = ['received_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['assignment', 'student'],
+                condition=models.Q(status='pending'),
+                name='intent_one_pending_uniq',
+            ),
+        ]
+        indexes = [
+            # The writer's queue: only pending intents are indexed
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status='pending'),
+                name='intent_queue_idx',
+            ),
+        ]
+
+
+class SubmissionSignature(models.Model):
+    """
+    MinHash signature of a submission's text for near-duplicate detection
+    (see assignment.similarity). Submissions without text have none.
+    """
+    submission = models.OneToOneField(
+        AssignmentSubmission,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature'
+    )
+    # Denormalized so one assignment's signatures are a single index range
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='submission_signatures'
+    )
+    minhash = models.BinaryField()
+    shingle_count = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"Signature of submission {self.submission_id}"
+
+
 class Comment(models.Model):
     """
     Model for comments on assignments or submissions
@@ -147,3 +321,38 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+
+
+class PendingAssignment(models.Model):
+    """
+    Materialized to-do entry: a published assignment that a student in its
+    classroom has not submitted yet. Rows are maintained incrementally by
+    assignment.pending, so pending counts and to-do lists are indexed lookups.
+    """
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='pending_assignments'
+    )
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='pending_entries'
+    )
+    # Denormalized from the assignment for membership changes and sorting
+    classroom = models.ForeignKey(
+        Classroom,
+        on_delete=models.CASCADE,
+        related_name='pending_entries'
+    )
+    due_date = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.assignment_id} pending for {self.student_id}"
+    
+    class Meta:
+        unique_together = ['student', 'assignment']
+        ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['student', 'due_date', 'id'], name='pending_student_due_idx'),
+        ]
@@ -0,0 +1,124 @@
+"""
+Incremental maintenance of the PendingAssignment to-do table.
+
+An assignment is pending for a student when it is published (and not a
+draft) in a classroom where the student has an active STUDENT membership,
+and the student has not submitted it. Each function below recomputes only
+the rows touched by one kind of change. Code that bypasses model signals
+(bulk_create, queryset.update) must call them itself.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from classroom.models import ClassroomMember
+from .models import AssignmentSubmission, PendingAssignment
+
+BATCH_SIZE = 1000
+
+
+def is_open(assignment):
+    """Whether students can currently see and submit the assignment."""
+    return assignment.is_published and not assignment.is_draft
+
+
+def _pending_pairs(**filters):
+    """
+    Yield PendingAssignment rows (unsaved) for every open assignment and
+    active student membership matching filters that has no submission.
+    Filter keys are ClassroomMember lookups; assignments are reached through
+    classroom__assignments.
+    """
+    submitted = AssignmentSubmission.objects.filter(
+        assignment_id=OuterRef('classroom__assignments__id'),
+        student_id=OuterRef('user_id'),
+    )
+    pairs = ClassroomMember.objects.filter(
+        role=ClassroomMember.Role.STUDENT,
+        is_active=True,
+        classroom__assignments__is_published=True,
+        classroom__assignments__is_draft=False,
+        **filters
+    ).annotate(
+        submitted=Exists(submitted),
+    ).filter(
+        submitted=False,
+    ).order_by().values_list(
+        'user_id', 'classroom__assignments__id', 'classroom_id', 'classroom__assignments__due_date'
+    )
+    for student_id, assignment_id, classroom_id, due_date in pairs.iterator(chunk_size=BATCH_SIZE):
+        yield PendingAssignment(
+            student_id=student_id,
+            assignment_id=assignment_id,
+            classroom_id=classroom_id,
+            due_date=due_date,
+        )
+
+
+def _insert(rows):
+    return len(PendingAssignment.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True))
+
+
+def sync_assignment(assignment):
+    """
+    Bring an assignment's to-do rows in line after it is created, edited,
+    published or unpublished.
+    """
+    with transaction.atomic():
+        if not is_open(assignment):
+            PendingAssignment.objects.filter(assignment=assignment).delete()
+            return
+        PendingAssignment.objects.filter(assignment=assignment).exclude(
+            due_date=assignment.due_date
+        ).update(due_date=assignment.due_date)
+        _insert(list(_pending_pairs(classroom__assignments__id=assignment.pk)))
+
+
+def sync_membership(classroom_id, user_id):
+    """
+    Recompute a student's to-do rows for one classroom after a membership is
+    created, changes role or active status, or is removed.
+    """
+    with transaction.atomic():
+        PendingAssignment.objects.filter(classroom_id=classroom_id, student_id=user_id).delete()
+        _insert(list(_pending_pairs(classroom_id=classroom_id, user_id=user_id)))
+
+
+def remove_submitted(submissions):
+    """Drop the to-do rows satisfied by newly created submissions."""
+    by_assignment = {}
+    for submission in submissions:
+        by_assignment.setdefault(submission.assignment_id, []).append(submission.student_id)
+    for assignment_id, student_ids in by_assignment.items():
+        PendingAssignment.objects.filter(assignment_id=assignment_id, student_id__in=student_ids).delete()
+
+
+def restore_unsubmitted(submission):
+    """Re-create the to-do row for a deleted submission if it still applies."""
+    _insert(list(_pending_pairs(
+        classroom__assignments__id=submission.assignment_id,
+        user_id=submission.student_id,
+    )))
+
+
+def rebuild_pending_assignments(student_ids=None):
+    """
+    Rebuild the to-do table from scratch, optionally for some students only.
+    Returns the number of rows written.
+    """
+    with transaction.atomic():
+        stale = PendingAssignment.objects.all()
+        filters = {}
+        if student_ids is not None:
+            student_ids = list(student_ids)
+            stale = stale.filter(student_id__in=student_ids)
+            filters['user_id__in'] = student_ids
+        stale.delete()
+
+        written = 0
+        batch = []
+        for row in _pending_pairs(**filters):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                written += _insert(batch)
+                batch = []
+        return written + _insert(batch)
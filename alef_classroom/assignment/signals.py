@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from classroom.models import ClassroomMember
+from core import activity
+from .models import Assignment, AssignmentSubmission
+from . import pending, similarity
+
+@receiver(post_save, sender=Assignment)
+def sync_pending_on_assignment_save(sender, instance, raw=False, **kwargs):
+    """
+    Add or remove to-do entries when an assignment is published, unpublished
+    or has its due date changed.
+    """
+    if not raw:
+        pending.sync_assignment(instance)
+
+@receiver(post_save, sender=AssignmentSubmission)
+def sync_pending_on_submission_save(sender, instance, created, raw=False, **kwargs):
+    """
+    A new submission completes the student's to-do entry.
+    """
+    if created and not raw:
+        pending.remove_submitted([instance])
+
+@receiver(post_delete, sender=AssignmentSubmission)
+def sync_pending_on_submission_delete(sender, instance, **kwargs):
+    """
+    Deleting a submission makes the assignment pending again.
+    """
+    pending.restore_unsubmitted(instance)
+
+@receiver(post_save, sender=ClassroomMember)
+def sync_pending_on_member_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Joining a classroom, changing role or being deactivated changes which
+    assignments are pending for the member.
+    """
+    if raw or not (created or instance.membership_changed()):
+        return
+    loaded_classroom_id = getattr(instance, '_loaded_classroom_id', None)
+    if not created and loaded_classroom_id not in (None, instance.classroom_id):
+        pending.sync_membership(loaded_classroom_id, instance.user_id)
+    pending.sync_membership(instance.classroom_id, instance.user_id)
+
+@receiver(post_delete, sender=ClassroomMember)
+def sync_pending_on_member_delete(sender, instance, **kwargs):
+    pending.sync_membership(instance.classroom_id, instance.user_id)
+
+@receiver(post_save, sender=Assignment)
+def record_assignment_activity(sender, instance, raw=False, **kwargs):
+    """
+    Put an assignment into its students' feeds the first time it becomes visible.
+    """
+    if not raw and pending.is_open(instance):
+        activity.record_assignments([instance])
+
+@receiver(post_save, sender=AssignmentSubmission)
+def record_submission_activity(sender, instance, created, raw=False, **kwargs):
+    """
+    New submissions go to the teachers' feeds and grades to the student's.
+    """
+    if raw:
+        return
+    if created:
+        activity.record_submissions([instance])
+    if instance.grade_changed():
+        activity.record_grades([instance])
+
+@receiver(post_save, sender=AssignmentSubmission)
+def update_submission_signature(sender, instance, raw=False, **kwargs):
+    """
+    Shingle new or edited submission text for near-duplicate detection,
+    after commit so the hashing never holds the write lock.
+    """
+    if not raw and instance.content_changed():
+        transaction.on_commit(lambda: similarity.update_signatures([instance]))
@@ -0,0 +1,200 @@
+"""
+Near-duplicate detection across submissions with MinHash and LSH.
+
+Each submission's text is split into overlapping word shingles and
+summarized by a MinHash signature of NUM_PERM 32-bit values, stored in
+SubmissionSignature when the submission is saved. The fraction of equal
+positions in two signatures estimates the Jaccard similarity of their
+shingle sets.
+
+To find similar pairs without comparing every pair, signatures are cut
+into BANDS bands of ROWS values (locality-sensitive hashing). Only
+submissions that share at least one identical band become candidates,
+which happens with high probability above roughly
+(1 / BANDS) ** (1 / ROWS) ~= 0.42 similarity and rarely below it.
+Candidates are then checked against SIMILARITY_THRESHOLD. The work grows
+with the number of submissions, not the number of pairs.
+
+Signatures are computed outside any write transaction (the signal handlers
+defer them until after commit) and only the resulting rows are written
+under the database lock.
+"""
+import hashlib
+import random
+import re
+from array import array
+from dataclasses import dataclass
+from itertools import combinations
+
+import numpy as np
+from django.db import transaction
+
+from .models import SubmissionSignature
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.5
+BATCH_SIZE = 500
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures must stay comparable across processes and releases
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+# The permutations as NUM_PERM x 1 columns. a * value needs up to 93 bits,
+# so a is split at bit 32 and each half's product reduced separately.
+_P = np.uint64(_PRIME)
+_A_HIGH = np.array([a >> 32 for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_A_LOW = np.array([a & _MAX_HASH for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+
+def shingles(text):
+    """The set of SHINGLE_WORDS-word shingles of text, as 32-bit hashes."""
+    words = re.findall(r'\w+', (text or '').lower())
+    if not words:
+        return set()
+    if len(words) < SHINGLE_WORDS:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=4).digest(), 'little')
+        for gram in grams
+    }
+
+
+def _fold(x):
+    # x mod (2**61 - 1), partially: 2**61 is 1 modulo the prime
+    return (x & _P) + (x >> np.uint64(61))
+
+
+def minhash(shingle_hashes):
+    """
+    MinHash signature (an array of NUM_PERM unsigned ints) of a non-empty
+    shingle set: min((a * value + b) % _PRIME) & _MAX_HASH per permutation,
+    computed for all permutations and shingles at once in exact uint64
+    arithmetic.
+    """
+    values = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))[None, :]
+    # a_high * value * 2**32, with a_high * value < 2**61 split at bit 29
+    high = _A_HIGH * values
+    high = ((high & np.uint64((1 << 29) - 1)) << np.uint64(32)) + (high >> np.uint64(29))
+    products = _fold(_fold(high + _fold(_A_LOW * values) + _B))
+    products = np.where(products >= _P, products - _P, products)
+    return array('I', (products.min(axis=1) & np.uint64(_MAX_HASH)).astype(np.uint32).tobytes())
+
+
+def estimate_similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERM
+
+
+def _signature_values(data):
+    values = array('I')
+    values.frombytes(bytes(data))
+    return values
+
+
+def update_signatures(submissions):
+    """
+    Store the signatures of the given submissions, replacing old ones.
+    Submissions without text lose their signature. Code that creates or
+    edits submissions in bulk must call this itself, after its own
+    transaction has committed.
+    """
+    signatures = []
+    empty = []
+    for submission in submissions:
+        hashes = shingles(submission.content)
+        if not hashes:
+            empty.append(submission.pk)
+            continue
+        signatures.append(SubmissionSignature(
+            submission_id=submission.pk,
+            assignment_id=submission.assignment_id,
+            minhash=minhash(hashes).tobytes(),
+            shingle_count=len(hashes),
+        ))
+    with transaction.atomic():
+        if empty:
+            SubmissionSignature.objects.filter(submission_id__in=empty).delete()
+        SubmissionSignature.objects.bulk_create(
+            signatures,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['submission'],
+            update_fields=['assignment', 'minhash', 'shingle_count'],
+        )
+    return len(signatures)
+
+
+def backfill_signatures(submissions, rebuild=False):
+    """
+    Compute the signatures missing from a queryset of submissions (all of
+    them with rebuild=True), in batches. Returns the number written.
+    """
+    if not rebuild:
+        submissions = submissions.filter(signature__isnull=True)
+    submissions = submissions.exclude(content__isnull=True).exclude(content='')
+    written = 0
+    batch = []
+    for submission in submissions.only('pk', 'assignment_id', 'content').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        batch.append(submission)
+        if len(batch) >= BATCH_SIZE:
+            written += update_signatures(batch)
+            batch = []
+    written += update_signatures(batch)
+    return written
+
+
+@dataclass
+class SimilarPair:
+    assignment_id: int
+    first_id: int
+    second_id: int
+    similarity: float
+
+    @property
+    def percent(self):
+        return round(self.similarity * 100)
+
+
+def _pairs_in(assignment_id, signatures, threshold):
+    """LSH over one assignment's {submission id: signature}."""
+    candidates = set()
+    for band in range(BANDS):
+        buckets = {}
+        start = band * ROWS
+        for submission_id, values in signatures.items():
+            buckets.setdefault(values[start:start + ROWS].tobytes(), []).append(submission_id)
+        for bucket in buckets.values():
+            if len(bucket) > 1:
+                candidates.update(combinations(sorted(bucket), 2))
+    pairs = []
+    for first_id, second_id in candidates:
+        similarity = estimate_similarity(signatures[first_id], signatures[second_id])
+        if similarity >= threshold:
+            pairs.append(SimilarPair(assignment_id, first_id, second_id, similarity))
+    return pairs
+
+
+def similar_pairs(assignment_ids, threshold=SIMILARITY_THRESHOLD):
+    """
+    Return the pairs of submissions to the same assignment whose estimated
+    similarity is at least threshold, most similar first.
+    """
+    by_assignment = {}
+    rows = SubmissionSignature.objects.filter(
+        assignment_id__in=assignment_ids
+    ).values_list('assignment_id', 'submission_id', 'minhash')
+    for assignment_id, submission_id, data in rows.iterator(chunk_size=BATCH_SIZE):
+        by_assignment.setdefault(assignment_id, {})[submission_id] = _signature_values(data)
+    pairs = []
+    for assignment_id, signatures in by_assignment.items():
+        pairs.extend(_pairs_in(assignment_id, signatures, threshold))
+    pairs.sort(key=lambda pair: (-pair.similarity, pair.assignment_id, pair.first_id, pair.second_id))
+    return pairs
@@ -10,6 +10,7 @@ urlpatterns = [
     path('<int:pk>/delete/', views.assignment_delete, name='delete'),
     
     # Assignment views for all users
+    path('todo/', views.todo_list, name='todo'),
     path('<int:pk>/', views.assignment_detail, name='detail'),
     path('list/<str:classroom_slug>/', views.assignment_list, name='list'),
     
@@ -21,6 +22,12 @@ urlpatterns = [
     path('<int:assignment_id>/submissions/', views.submission_list, name='submissions'),
     path('submission/<int:pk>/', views.submission_detail, name='submission_detail'),
     path('submission/<int:pk>/grade/', views.submission_grade, name='grade'),
+    path('<int:assignment_id>/grade/', views.grading_grid, name='grade_grid'),
+    path('gradebook/<str:classroom_slug>/', views.gradebook_export, name='gradebook'),
+    
+    # Grade statistics and curving for teachers
+    path('<int:pk>/statistics/', views.assignment_statistics, name='statistics'),
+    path('statistics/<str:classroom_slug>/', views.classroom_statistics, name='classroom_statistics'),
     
     # Comment views
     path('<int:assignment_id>/comment/', views.assignment_comment, name='assignment_comment'),
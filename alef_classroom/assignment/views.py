@@ -1,37 +1,59 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.utils import timezone
-from .models import Assignment, AssignmentSubmission, Comment
-from classroom.models import Classroom, ClassroomMember
+from .models import Assignment, AssignmentSubmission, Comment, PendingAssignment
+from classroom.models import Classroom
+from classroom.membership import get_membership
 from django.db.models import Q
+from django.template.defaultfilters import pluralize
+from core.pagination import cursor_paginate
+from core.csv_export import stream_csv
+from core.retry import retry_on_locked
+from core.routers import use_replica
+from . import grade_statistics
+from .gradebook import gradebook_assignments, gradebook_header, gradebook_rows
+from .grading import apply_grades, grid_rows
+from .ingestion import pending_intent, queued_ingestion, receive
+from .similarity import similar_pairs
+
+TODO_PER_PAGE = 20
 
 # Helper function to check if user is a teacher or admin in a classroom
-def is_teacher(user, classroom):
-    # Admins can always act as teachers
-    if user.is_admin:
-        return True
-    try:
-        member = ClassroomMember.objects.get(user=user, classroom=classroom)
-        return member.role in [ClassroomMember.Role.TEACHER, ClassroomMember.Role.ADMIN]
-    except ClassroomMember.DoesNotExist:
-        # Check if user is the creator (always considered a teacher)
-        return classroom.creator == user
+def is_teacher(request, classroom):
+    return get_membership(request).is_teacher(classroom)
 
 # Helper function to check if user is a student in a classroom
-def is_student(user, classroom):
-    try:
-        member = ClassroomMember.objects.get(user=user, classroom=classroom)
-        return member.role == ClassroomMember.Role.STUDENT
-    except ClassroomMember.DoesNotExist:
-        return False
+def is_student(request, classroom):
+    return get_membership(request).is_student(classroom)
 
 # Helper function to check if user is a member of a classroom
-def is_classroom_member(user, classroom):
-    return ClassroomMember.objects.filter(user=user, classroom=classroom).exists()
+def is_classroom_member(request, classroom):
+    return get_membership(request).is_member(classroom)
 
 # Assignment Views
+@login_required
+def todo_list(request):
+    """
+    Cross-classroom list of the user's unsubmitted assignments, soonest due first.
+    """
+    pending = PendingAssignment.objects.filter(student=request.user).select_related('assignment', 'classroom')
+    page = cursor_paginate(
+        pending,
+        cursor=request.GET.get('cursor'),
+        ordering=('due_date', 'pk'),
+        per_page=TODO_PER_PAGE,
+    )
+    
+    context = {
+        'page': page,
+        'pending_count': pending.count(),
+        'now': timezone.now(),
+    }
+    
+    return render(request, 'assignment/todo.html', context)
+
 @login_required
 def assignment_list(request, classroom_slug):
     classroom = get_object_or_404(Classroom, slug=classroom_slug)
@@ -39,43 +61,49 @@ def assignment_list(request, classroom_slug):
     # Admins can view all classrooms and assignments
     if not request.user.is_admin:
         # Check if user is a member of the classroom
-        if not is_classroom_member(request.user, classroom):
+        if not is_classroom_member(request, classroom):
             messages.error(request, "You are not a member of this classroom.")
             return redirect('classroom:list')
     
     # Get assignments for this classroom
     assignments = Assignment.objects.filter(classroom=classroom)
+    teacher = is_teacher(request, classroom)
     
-    # For students, show only published assignments
-    if not is_teacher(request.user, classroom):
+    if teacher:
+        # Teachers see submission and graded counts for every assignment
+        assignments = assignments.with_submission_counts()
+    else:
+        # For students, show only published assignments
         assignments = assignments.filter(is_published=True, is_draft=False)
-    
-    # For students, include submission status
-    if is_student(request.user, classroom):
+    assignments = list(assignments)
+    
+    # For students, include submission status (fetched in one query)
+    if is_student(request, classroom):
+        submissions = {
+            submission.assignment_id: submission
+            for submission in AssignmentSubmission.objects.filter(
+                assignment__classroom=classroom,
+                student=request.user
+            )
+        }
         for assignment in assignments:
-            try:
-                submission = AssignmentSubmission.objects.get(
-                    assignment=assignment,
-                    student=request.user
-                )
-                assignment.user_submission = submission
-            except AssignmentSubmission.DoesNotExist:
-                assignment.user_submission = None
+            assignment.user_submission = submissions.get(assignment.pk)
     
     context = {
         'classroom': classroom,
         'assignments': assignments,
-        'is_teacher': is_teacher(request.user, classroom)
+        'is_teacher': teacher
     }
     
     return render(request, 'assignment/list.html', context)
 
 @login_required
+@retry_on_locked
 def assignment_create(request, classroom_slug):
     classroom = get_object_or_404(Classroom, slug=classroom_slug)
     
     # Check if user is a teacher
-    if not is_teacher(request.user, classroom):
+    if not is_teacher(request, classroom):
         messages.error(request, "Only teachers can create assignments.")
         return redirect('classroom:detail', pk=classroom.pk)
     
@@ -122,12 +150,13 @@ def assignment_create(request, classroom_slug):
     return render(request, 'assignment/create.html', context)
 
 @login_required
+@retry_on_locked
 def assignment_edit(request, pk):
     assignment = get_object_or_404(Assignment, pk=pk)
     classroom = assignment.classroom
     
     # Check if user is a teacher and created this assignment
-    if not is_teacher(request.user, classroom) or assignment.created_by != request.user:
+    if not is_teacher(request, classroom) or assignment.created_by != request.user:
         messages.error(request, "You don't have permission to edit this assignment.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -160,12 +189,13 @@ def assignment_edit(request, pk):
     return render(request, 'assignment/edit.html', context)
 
 @login_required
+@retry_on_locked
 def assignment_delete(request, pk):
     assignment = get_object_or_404(Assignment, pk=pk)
     classroom = assignment.classroom
     
     # Check if user is a teacher and created this assignment
-    if not is_teacher(request.user, classroom) or assignment.created_by != request.user:
+    if not is_teacher(request, classroom) or assignment.created_by != request.user:
         messages.error(request, "You don't have permission to delete this assignment.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -183,29 +213,31 @@ def assignment_delete(request, pk):
 
 @login_required
 def assignment_detail(request, pk):
-    assignment = get_object_or_404(Assignment, pk=pk)
+    assignment = get_object_or_404(Assignment.objects.select_related('classroom'), pk=pk)
     classroom = assignment.classroom
     
     # Check if user is a member of the classroom
-    if not is_classroom_member(request.user, classroom):
+    if not is_classroom_member(request, classroom):
         messages.error(request, "You are not a member of this classroom.")
         return redirect('classroom:list')
     
     # Students can only view published assignments
-    if is_student(request.user, classroom) and (not assignment.is_published or assignment.is_draft):
+    if is_student(request, classroom) and (not assignment.is_published or assignment.is_draft):
         messages.error(request, "This assignment is not available.")
         return redirect('assignment:list', classroom_slug=classroom.slug)
     
     # Get user's submission if exists
     user_submission = None
-    if is_student(request.user, classroom):
+    queued_submission = None
+    if is_student(request, classroom):
         try:
             user_submission = AssignmentSubmission.objects.get(
                 assignment=assignment,
                 student=request.user
             )
         except AssignmentSubmission.DoesNotExist:
-            pass
+            # A queued submission the writer has not committed yet
+            queued_submission = pending_intent(assignment, request.user)
     
     # Get comments
     comments = Comment.objects.filter(assignment=assignment)
@@ -213,8 +245,9 @@ def assignment_detail(request, pk):
     context = {
         'assignment': assignment,
         'classroom': classroom,
-        'is_teacher': is_teacher(request.user, classroom),
+        'is_teacher': is_teacher(request, classroom),
         'user_submission': user_submission,
+        'queued_submission': queued_submission,
         'comments': comments,
         'now': timezone.now()
     }
@@ -223,12 +256,13 @@ def assignment_detail(request, pk):
 
 # Submission Views
 @login_required
+@retry_on_locked
 def submission_create(request, assignment_id):
     assignment = get_object_or_404(Assignment, pk=assignment_id)
     classroom = assignment.classroom
     
     # Check if user is a student
-    if not is_student(request.user, classroom):
+    if not is_student(request, classroom):
         messages.error(request, "Only students can submit assignments.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -247,8 +281,15 @@ def submission_create(request, assignment_id):
     except AssignmentSubmission.DoesNotExist:
         pass
     
+    # Or has one waiting in the ingestion queue
+    intent = pending_intent(assignment, request.user)
+    if intent is not None:
+        messages.info(request, "Your submission has been received and is being processed.")
+        return redirect('assignment:detail', pk=assignment.id)
+    
     # Check if submission is late
-    is_late = timezone.now() > assignment.due_date
+    received_at = timezone.now()
+    is_late = received_at > assignment.due_date
     
     # If late submissions are not allowed
     if is_late and not assignment.allow_late_submissions:
@@ -258,6 +299,20 @@ def submission_create(request, assignment_id):
     if request.method == 'POST':
         content = request.POST.get('content', '')
         
+        # In queued mode only record the intent; ingest_submissions commits it
+        if queued_ingestion():
+            intent, created = receive(
+                assignment, request.user, content, request.FILES.get('attachment'), received_at
+            )
+            if intent is None:
+                # An earlier submission was ingested while this one was refused
+                messages.info(request, "Your submission has already been received.")
+                return redirect('assignment:detail', pk=assignment.id)
+            received = timezone.localtime(intent.received_at).strftime('%b %d, %Y %I:%M:%S %p')
+            late = " (late)" if intent.is_late else ""
+            messages.success(request, f"Submission received at {received}{late}. Receipt #{intent.pk}.")
+            return redirect('assignment:detail', pk=assignment.id)
+        
         # Create submission
         submission = AssignmentSubmission.objects.create(
             assignment=assignment,
@@ -282,6 +337,7 @@ def submission_create(request, assignment_id):
     return render(request, 'assignment/submit.html', context)
 
 @login_required
+@retry_on_locked
 def submission_edit(request, pk):
     submission = get_object_or_404(AssignmentSubmission, pk=pk)
     assignment = submission.assignment
@@ -321,16 +377,24 @@ def submission_list(request, assignment_id):
     classroom = assignment.classroom
     
     # Check if user is a teacher
-    if not is_teacher(request.user, classroom):
+    if not is_teacher(request, classroom):
         messages.error(request, "Only teachers can view all submissions.")
         return redirect('assignment:detail', pk=assignment.id)
     
-    submissions = AssignmentSubmission.objects.filter(assignment=assignment)
+    submissions = list(AssignmentSubmission.objects.filter(assignment=assignment).select_related('student'))
+    
+    # Possible near-duplicates, found from the stored MinHash signatures
+    by_id = {submission.pk: submission for submission in submissions}
+    similar_submissions = [
+        (pair, by_id[pair.first_id], by_id[pair.second_id])
+        for pair in similar_pairs([assignment.pk])
+    ]
     
     context = {
         'assignment': assignment,
         'classroom': classroom,
-        'submissions': submissions
+        'submissions': submissions,
+        'similar_submissions': similar_submissions,
     }
     
     return render(request, 'assignment/submissions.html', context)
@@ -342,7 +406,7 @@ def submission_detail(request, pk):
     classroom = assignment.classroom
     
     # Check if user is a teacher or the owner of the submission
-    if not (is_teacher(request.user, classroom) or submission.student == request.user):
+    if not (is_teacher(request, classroom) or submission.student == request.user):
         messages.error(request, "You don't have permission to view this submission.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -353,20 +417,21 @@ def submission_detail(request, pk):
         'submission': submission,
         'assignment': assignment,
         'classroom': classroom,
-        'is_teacher': is_teacher(request.user, classroom),
+        'is_teacher': is_teacher(request, classroom),
         'comments': comments
     }
     
     return render(request, 'assignment/submission_detail.html', context)
 
 @login_required
+@retry_on_locked
 def submission_grade(request, pk):
     submission = get_object_or_404(AssignmentSubmission, pk=pk)
     assignment = submission.assignment
     classroom = assignment.classroom
     
     # Check if user is a teacher
-    if not is_teacher(request.user, classroom):
+    if not is_teacher(request, classroom):
         messages.error(request, "Only teachers can grade submissions.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -399,14 +464,141 @@ def submission_grade(request, pk):
     
     return render(request, 'assignment/grade.html', context)
 
+@login_required
+@retry_on_locked
+def grading_grid(request, assignment_id):
+    """Grade every submission of an assignment from one spreadsheet-style form."""
+    assignment = get_object_or_404(Assignment.objects.select_related('classroom'), pk=assignment_id)
+    classroom = assignment.classroom
+    
+    # Check if user is a teacher
+    if not is_teacher(request, classroom):
+        messages.error(request, "Only teachers can grade submissions.")
+        return redirect('assignment:detail', pk=assignment.id)
+    
+    submissions = list(AssignmentSubmission.objects.filter(assignment=assignment).select_related('student'))
+    
+    if request.method == 'POST':
+        rows, graded = apply_grades(assignment, submissions, request.POST, request.user)
+        errors = sum(1 for row in rows if row.error)
+        if not errors:
+            messages.success(request, f"Saved {len(graded)} grade{pluralize(len(graded))}.")
+            return redirect('assignment:submissions', assignment_id=assignment.id)
+        # Keep the valid rows and show the rest with what was entered
+        messages.warning(
+            request,
+            f"Saved {len(graded)} grade{pluralize(len(graded))}; "
+            f"{errors} row{pluralize(errors)} need{pluralize(errors, 's,')} attention."
+        )
+    else:
+        rows = grid_rows(submissions)
+    
+    context = {
+        'assignment': assignment,
+        'classroom': classroom,
+        'rows': rows,
+    }
+    
+    return render(request, 'assignment/grade_grid.html', context)
+
+@login_required
+@use_replica
+def gradebook_export(request, classroom_slug):
+    """Download the classroom's student-by-assignment grades as a CSV file."""
+    classroom = get_object_or_404(Classroom, slug=classroom_slug)
+    
+    # Admins can export any classroom; otherwise only its teachers
+    if not (request.user.is_admin or is_teacher(request, classroom)):
+        messages.error(request, "Only teachers can export the gradebook.")
+        return redirect('classroom:detail', pk=classroom.pk)
+    
+    assignments = gradebook_assignments(classroom)
+    return stream_csv(
+        f'gradebook-{classroom.slug}.csv',
+        gradebook_header(assignments),
+        gradebook_rows(classroom, assignments),
+    )
+
+@login_required
+@retry_on_locked
+def assignment_statistics(request, pk):
+    """
+    Score distribution and student standings for an assignment, with
+    curving. ?format=json returns the statistics as JSON.
+    """
+    assignment = get_object_or_404(Assignment.objects.select_related('classroom'), pk=pk)
+    classroom = assignment.classroom
+    
+    # Check if user is a teacher
+    if not is_teacher(request, classroom):
+        messages.error(request, "Only teachers can view grade statistics.")
+        return redirect('assignment:detail', pk=assignment.id)
+    
+    curve_preview = None
+    if request.method == 'POST':
+        try:
+            curve = grade_statistics.Curve.from_data(request.POST)
+        except ValueError as e:
+            messages.error(request, str(e))
+        else:
+            apply = 'apply' in request.POST
+            curve_preview = grade_statistics.curve_assignment(assignment, curve, request.user, commit=apply)
+            if apply:
+                messages.success(
+                    request,
+                    f"Curve applied to {curve_preview.changed} grade{pluralize(curve_preview.changed)}."
+                )
+                return redirect('assignment:statistics', pk=assignment.id)
+    
+    statistics = grade_statistics.assignment_statistics(assignment)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(statistics.as_dict())
+    
+    context = {
+        'assignment': assignment,
+        'classroom': classroom,
+        'statistics': statistics,
+        'curve_kinds': grade_statistics.Curve.KINDS,
+        'curve_form': request.POST,
+        'curve_preview': curve_preview,
+    }
+    
+    return render(request, 'assignment/statistics.html', context)
+
+@login_required
+@use_replica
+def classroom_statistics(request, classroom_slug):
+    """
+    Grade statistics across a classroom's published assignments.
+    ?format=json returns them as JSON.
+    """
+    classroom = get_object_or_404(Classroom, slug=classroom_slug)
+    
+    # Admins can view any classroom; otherwise only its teachers
+    if not (request.user.is_admin or is_teacher(request, classroom)):
+        messages.error(request, "Only teachers can view grade statistics.")
+        return redirect('classroom:detail', pk=classroom.pk)
+    
+    statistics = grade_statistics.classroom_statistics(classroom)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(statistics.as_dict())
+    
+    context = {
+        'classroom': classroom,
+        'statistics': statistics,
+    }
+    
+    return render(request, 'assignment/classroom_statistics.html', context)
+
 # Comment Views
 @login_required
+@retry_on_locked
 def assignment_comment(request, assignment_id):
     assignment = get_object_or_404(Assignment, pk=assignment_id)
     classroom = assignment.classroom
     
     # Check if user is a member of the classroom
-    if not is_classroom_member(request.user, classroom):
+    if not is_classroom_member(request, classroom):
         messages.error(request, "You are not a member of this classroom.")
         return redirect('classroom:list')
     
@@ -428,13 +620,14 @@ def assignment_comment(request, assignment_id):
     return redirect('assignment:detail', pk=assignment.id)
 
 @login_required
+@retry_on_locked
 def submission_comment(request, submission_id):
     submission = get_object_or_404(AssignmentSubmission, pk=submission_id)
     assignment = submission.assignment
     classroom = assignment.classroom
     
     # Check if user is a teacher or the owner of the submission
-    if not (is_teacher(request.user, classroom) or submission.student == request.user):
+    if not (is_teacher(request, classroom) or submission.student == request.user):
         messages.error(request, "You don't have permission to comment on this submission.")
         return redirect('assignment:detail', pk=assignment.id)
     
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from core.search import FullTextSearchAdminMixin
 from .models import Classroom, ClassroomMember, Announcement, Comment
 
 @admin.register(Classroom)
@@ -6,10 +7,10 @@ class ClassroomAdmin(admin.ModelAdmin):
     """
     Admin for classrooms - allows viewing and managing all classrooms.
     """
-    list_display = ('name', 'creator', 'subject', 'section', 'course_code', 'is_active', 'created_at')
+    list_display = ('name', 'creator', 'subject', 'section', 'course_code', 'student_count', 'is_active', 'created_at')
     list_filter = ('is_active', 'is_archived', 'created_at', 'subject')
     search_fields = ('name', 'description', 'course_code', 'creator__username')
-    readonly_fields = ('course_code', 'slug', 'created_at', 'updated_at')
+    readonly_fields = ('course_code', 'slug', 'teacher_count', 'student_count', 'admin_count', 'created_at', 'updated_at')
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'description', 'subject', 'section')
@@ -20,6 +21,10 @@ class ClassroomAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('is_active', 'is_archived')
         }),
+        ('Members', {
+            'fields': ('teacher_count', 'student_count', 'admin_count'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -53,13 +58,15 @@ class ClassroomMemberAdmin(admin.ModelAdmin):
 
 
 @admin.register(Announcement)
-class AnnouncementAdmin(admin.ModelAdmin):
+class AnnouncementAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """
     Admin for announcements - allows viewing and managing all announcements.
     """
     list_display = ('title', 'classroom', 'author', 'is_pinned', 'created_at')
     list_filter = ('is_pinned', 'classroom', 'created_at')
-    search_fields = ('title', 'content', 'classroom__name', 'author__username')
+    # Titles and text are searched through the full-text index
+    search_fields = ('=classroom__name', '=author__username')
+    fulltext_fallback_fields = ('title', 'content')
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         ('Announcement Details', {
@@ -77,13 +84,14 @@ class AnnouncementAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """
     Admin for comments - allows viewing and managing all comments.
     """
     list_display = ('author', 'announcement', 'created_at')
     list_filter = ('announcement', 'created_at')
-    search_fields = ('content', 'author__username', 'announcement__title')
+    search_fields = ('=author__username', '=announcement__title')
+    fulltext_fallback_fields = ('content',)
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         ('Comment Details', {
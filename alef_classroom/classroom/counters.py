@@ -0,0 +1,77 @@
+"""
+Maintenance of the denormalized member counters on Classroom.
+
+The counters include active memberships only. Single membership changes
+adjust them with F() expressions so that concurrent joins never lose an
+update. Bulk operations that bypass model signals (bulk_create,
+queryset.update) should call rebuild_member_counts() for the classrooms
+they touched.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Classroom, ClassroomMember
+
+COUNTER_FIELDS = {
+    ClassroomMember.Role.TEACHER: 'teacher_count',
+    ClassroomMember.Role.STUDENT: 'student_count',
+    ClassroomMember.Role.ADMIN: 'admin_count',
+}
+
+
+def increment_member_count(classroom_id, role, delta=1):
+    """Atomically add delta to the counter for role in a classroom."""
+    field = COUNTER_FIELDS.get(role)
+    if field is None:
+        return
+    Classroom.objects.filter(pk=classroom_id).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def rebuild_member_counts(classroom_ids=None):
+    """
+    Recompute the counters from ClassroomMember rows with a single UPDATE.
+    Returns the number of classrooms updated.
+    """
+    classrooms = Classroom.objects.all()
+    if classroom_ids is not None:
+        classrooms = classrooms.filter(pk__in=list(classroom_ids))
+    updates = {}
+    for role, field in COUNTER_FIELDS.items():
+        counts = (
+            ClassroomMember.objects
+            .filter(classroom=OuterRef('pk'), role=role, is_active=True)
+            .order_by()
+            .values('classroom')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    return classrooms.update(**updates)
+
+
+def find_member_count_drift(classroom_ids=None):
+    """
+    Return (classroom, {field: (stored, actual)}) pairs for every classroom
+    whose counters disagree with its ClassroomMember rows.
+    """
+    classrooms = Classroom.objects.all()
+    if classroom_ids is not None:
+        classrooms = classrooms.filter(pk__in=list(classroom_ids))
+    classrooms = classrooms.annotate(**{
+        f'actual_{field}': Count('members', filter=Q(members__role=role, members__is_active=True))
+        for role, field in COUNTER_FIELDS.items()
+    }).order_by('pk')
+
+    drift = []
+    for classroom in classrooms.iterator():
+        fields = {}
+        for field in COUNTER_FIELDS.values():
+            stored = getattr(classroom, field)
+            actual = getattr(classroom, f'actual_{field}')
+            if stored != actual:
+                fields[field] = (stored, actual)
+        if fields:
+            drift.append((classroom, fields))
+    return drift
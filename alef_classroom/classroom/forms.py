@@ -33,13 +33,12 @@ class ClassroomJoinForm(forms.Form):
     def clean_course_code(self):
         """
         Clean and normalize the course code.
-        Strip whitespace for consistent matching.
-        UUIDs are case-insensitive, so we'll do case-insensitive matching in the view.
+        Strip whitespace and lowercase it: course codes are stored in
+        lowercase, so the view can match them exactly on every database.
         """
-        course_code = self.cleaned_data.get('course_code', '').strip()
+        course_code = self.cleaned_data.get('course_code', '').strip().lower()
         if not course_code:
             raise forms.ValidationError("Course code cannot be empty.")
-        # Just strip whitespace - keep original format for flexible matching
         return course_code
 
 
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from classroom.counters import find_member_count_drift, rebuild_member_counts
+
+
+class Command(BaseCommand):
+    help = 'Audit and rebuild the denormalized member counters on classrooms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--classroom', type=int, action='append', dest='classrooms',
+            help='Only check this classroom id (may be repeated)',
+        )
+        parser.add_argument(
+            '--audit', action='store_true',
+            help='Report drifted counters without rebuilding them',
+        )
+
+    def handle(self, *args, **options):
+        classroom_ids = options['classrooms']
+
+        drift = find_member_count_drift(classroom_ids)
+        for classroom, fields in drift:
+            changes = ', '.join(
+                f'{field}: {stored} -> {actual}' for field, (stored, actual) in fields.items()
+            )
+            self.stdout.write(f'{classroom} (id={classroom.pk}): {changes}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All member counters are correct.'))
+            return
+
+        if options['audit']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} classroom(s) have drifted counters.'))
+            return
+
+        updated = rebuild_member_counts(classroom_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt member counters for {updated} classroom(s).'))
@@ -0,0 +1,40 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from classroom.roster_sync import RosterSyncError, parse_rosters, sync_rosters
+
+
+class Command(BaseCommand):
+    help = 'Sync classroom memberships to rosters from a JSON file (adds, role changes and deactivations)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON roster file, or '-' for standard input")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report the changes without applying them',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                data = json.load(sys.stdin)
+            else:
+                with open(options['path'], encoding='utf-8') as f:
+                    data = json.load(f)
+            diffs = sync_rosters(parse_rosters(data), dry_run=options['dry_run'])
+        except (OSError, ValueError, RosterSyncError) as e:
+            raise CommandError(str(e))
+
+        for diff in diffs:
+            counts = ', '.join(
+                f'{len(getattr(diff, name))} {name.replace("_", " ")}'
+                for name in ('added', 'reactivated', 'role_changed', 'removed', 'unknown_users')
+            )
+            self.stdout.write(f'{diff.classroom} ({diff.classroom.slug}): {counts}')
+            for username in diff.unknown_users:
+                self.stderr.write(f'  Unknown user: {username}')
+
+        changed = sum(diff.changed for diff in diffs)
+        verb = 'Would change' if options['dry_run'] else 'Changed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {changed} of {len(diffs)} classroom(s).'))
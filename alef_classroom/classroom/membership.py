@@ -0,0 +1,76 @@
+"""
+Request-scoped resolution of a user's role in classrooms.
+
+Views ask the resolver attached to the current request instead of querying
+ClassroomMember directly, so each classroom role is looked up at most once
+per request no matter how many permission checks a view performs.
+"""
+from .models import ClassroomMember
+
+TEACHING_ROLES = (ClassroomMember.Role.TEACHER, ClassroomMember.Role.ADMIN)
+
+
+class MembershipResolver:
+    """
+    Memoizes the roles a user holds in classrooms.
+
+    A role of None means the user has no active ClassroomMember row for that
+    classroom.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._roles = {}
+        self._loaded_all = False
+
+    def load_all(self):
+        """
+        Load the user's role in every classroom with a single query.
+        Returns a dict mapping classroom id to role.
+        """
+        if not self._loaded_all:
+            self._roles = dict(
+                ClassroomMember.objects.filter(user=self.user, is_active=True).values_list('classroom_id', 'role')
+            )
+            self._loaded_all = True
+        return self._roles
+
+    def role(self, classroom):
+        """Return the user's role in a classroom (instance or pk), or None."""
+        classroom_id = getattr(classroom, 'pk', classroom)
+        if classroom_id not in self._roles and not self._loaded_all:
+            self._roles[classroom_id] = ClassroomMember.objects.filter(
+                user=self.user, classroom_id=classroom_id, is_active=True
+            ).values_list('role', flat=True).first()
+        return self._roles.get(classroom_id)
+
+    def remember(self, classroom, role):
+        """Record a membership created or changed during the current request."""
+        self._roles[getattr(classroom, 'pk', classroom)] = role
+
+    def is_member(self, classroom):
+        return self.role(classroom) is not None
+
+    def is_student(self, classroom):
+        return self.role(classroom) == ClassroomMember.Role.STUDENT
+
+    def is_teacher(self, classroom):
+        """
+        Admins can always act as teachers. Members with a teaching role are
+        teachers, and the creator is a teacher when they have no membership row.
+        """
+        if self.user.is_admin:
+            return True
+        role = self.role(classroom)
+        if role is None:
+            return classroom.creator_id == self.user.pk
+        return role in TEACHING_ROLES
+
+
+def get_membership(request):
+    """Return the MembershipResolver for the current request, creating it on first use."""
+    resolver = getattr(request, '_membership_resolver', None)
+    if resolver is None:
+        resolver = MembershipResolver(request.user)
+        request._membership_resolver = resolver
+    return resolver
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:41
+
+import classroom.models
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_member_counts(apps, schema_editor):
+    Classroom = apps.get_model('classroom', 'Classroom')
+    ClassroomMember = apps.get_model('classroom', 'ClassroomMember')
+    updates = {}
+    for role, field in (('TEACHER', 'teacher_count'), ('STUDENT', 'student_count'), ('ADMIN', 'admin_count')):
+        counts = (
+            ClassroomMember.objects
+            .filter(classroom=OuterRef('pk'), role=role)
+            .order_by()
+            .values('classroom')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    Classroom.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroom',
+            name='admin_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='classroom',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='classroom',
+            name='teacher_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='classroom',
+            name='course_code',
+            field=models.CharField(default=classroom.models.generate_course_code, max_length=36, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='classroommember',
+            name='role',
+            field=models.CharField(choices=[('TEACHER', 'Teacher'), ('STUDENT', 'Student'), ('ADMIN', 'Admin')], default='STUDENT', max_length=10),
+        ),
+        migrations.RunPython(populate_member_counts, migrations.RunPython.noop),
+    ]
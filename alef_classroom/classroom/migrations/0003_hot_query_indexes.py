@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0002_classroom_member_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(condition=models.Q(('is_pinned', False)), fields=['classroom', '-created_at', '-id'], name='announcement_stream_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['creator', '-created_at'], name='classroom_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='classroom_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroommember',
+            index=models.Index(fields=['user', '-joined_at'], name='member_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroommember',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-joined_at'], name='member_active_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroommember',
+            index=models.Index(fields=['classroom', 'role', 'joined_at'], name='member_classroom_role_idx'),
+        ),
+    ]
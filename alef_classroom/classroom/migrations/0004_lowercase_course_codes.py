@@ -0,0 +1,18 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_course_codes(apps, schema_editor):
+    Classroom = apps.get_model('classroom', 'Classroom')
+    Classroom.objects.exclude(course_code=Lower('course_code')).update(course_code=Lower('course_code'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_course_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:46
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0004_lowercase_course_codes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='classroommember',
+            name='member_user_idx',
+        ),
+    ]
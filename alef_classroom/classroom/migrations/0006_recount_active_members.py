@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def recount_active_members(apps, schema_editor):
+    # The counters now include active memberships only (classroom.counters);
+    # classrooms that already had inactive members were counted with them
+    Classroom = apps.get_model('classroom', 'Classroom')
+    ClassroomMember = apps.get_model('classroom', 'ClassroomMember')
+    updates = {}
+    for role, field in (('TEACHER', 'teacher_count'), ('STUDENT', 'student_count'), ('ADMIN', 'admin_count')):
+        counts = (
+            ClassroomMember.objects
+            .filter(classroom=OuterRef('pk'), role=role, is_active=True)
+            .order_by()
+            .values('classroom')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    Classroom.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0005_drop_member_user_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_active_members, migrations.RunPython.noop),
+    ]
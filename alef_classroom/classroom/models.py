@@ -29,9 +29,16 @@ class Classroom(models.Model):
     is_active = models.BooleanField(default=True)
     is_archived = models.BooleanField(default=False)
     
+    # Denormalized member counts, maintained by classroom.signals
+    teacher_count = models.PositiveIntegerField(default=0, editable=False)
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    admin_count = models.PositiveIntegerField(default=0, editable=False)
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(f"{self.name}-{self.section}")
+        # Stored in lowercase so joining can match codes exactly
+        self.course_code = self.course_code.lower()
         # Compress banner image if provided
         if self.banner_image:
             self.banner_image = compress_image(self.banner_image, max_width=1500, max_height=500, quality=85)
@@ -40,20 +47,17 @@ class Classroom(models.Model):
     def __str__(self):
         return f"{self.name} - {self.section}"
     
-    @property
-    def teacher_count(self):
-        return self.members.filter(role='TEACHER').count()
-    
-    @property
-    def student_count(self):
-        return self.members.filter(role='STUDENT').count()
-    
-    @property
-    def admin_count(self):
-        return self.members.filter(role='ADMIN').count()
-    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['creator', '-created_at'], name='classroom_creator_idx'),
+            # Classroom listings only show active classrooms
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='classroom_active_idx',
+            ),
+        ]
 
 
 class ClassroomMember(models.Model):
@@ -85,12 +89,64 @@ class ClassroomMember(models.Model):
     last_active = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so that post_save handlers can tell when
+        # a save changes the member's role, classroom or active status
+        instance._remember_loaded_state(dict(zip(field_names, values)))
+        return instance
+    
+    def _remember_loaded_state(self, values):
+        self._loaded_role = values.get('role')
+        self._loaded_classroom_id = values.get('classroom_id')
+        self._loaded_is_active = values.get('is_active')
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have run; later saves compare against this state
+        self._remember_loaded_state({
+            'role': self.role,
+            'classroom_id': self.classroom_id,
+            'is_active': self.is_active,
+        })
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_loaded_state({
+            'role': self.role,
+            'classroom_id': self.classroom_id,
+            'is_active': self.is_active,
+        })
+    
+    def membership_changed(self):
+        """
+        Whether the last save changed the role, classroom or active status.
+        Only meaningful inside post_save handlers for an existing row.
+        """
+        return (
+            getattr(self, '_loaded_role', self.role) != self.role
+            or getattr(self, '_loaded_classroom_id', self.classroom_id) != self.classroom_id
+            or getattr(self, '_loaded_is_active', self.is_active) != self.is_active
+        )
+    
     def __str__(self):
         return f"{self.user.username} in {self.classroom.name} as {self.role}"
     
     class Meta:
         unique_together = ['classroom', 'user']
         ordering = ['role', 'joined_at']
+        indexes = [
+            # A user's classrooms, most recently joined first. Every per-user
+            # query filters on is_active; the plain user_id index covers the rest
+            models.Index(
+                fields=['user', '-joined_at'],
+                condition=models.Q(is_active=True),
+                name='member_active_user_idx',
+            ),
+            # Member lists for a classroom in the default (role, joined_at) order
+            models.Index(fields=['classroom', 'role', 'joined_at'], name='member_classroom_role_idx'),
+        ]
 
 
 class Announcement(models.Model):
@@ -118,6 +174,14 @@ class Announcement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The paginated stream of unpinned announcements
+            models.Index(
+                fields=['classroom', '-created_at', '-id'],
+                condition=models.Q(is_pinned=False),
+                name='announcement_stream_idx',
+            ),
+        ]
 
 
 class Comment(models.Model):
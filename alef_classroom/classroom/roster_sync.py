@@ -0,0 +1,187 @@
+"""
+Roster sync: bring classroom memberships in line with an external roster.
+
+A roster lists the members a classroom should have and their roles. For
+each classroom the current memberships are read with one query and
+compared with the roster using set operations:
+
+    added        on the roster with no membership row
+    reactivated  on the roster with a deactivated membership
+    role_changed on the roster with an active membership in another role
+    removed      active members missing from the roster (deactivated, not
+                 deleted, so their submissions and history are kept)
+
+Every classroom's changes are applied together in one transaction: one
+bulk insert, one bulk update of role and is_active, and one UPDATE that
+deactivates. The counters, to-do rows and dashboard versions that model
+signals would update are then recomputed once. Syncing the same roster
+again changes nothing. The classroom's creator is never removed.
+
+Roster format (also the JSON body of the roster sync endpoint):
+
+    {"classrooms": [
+        {"classroom": "<course code or slug>",
+         "members": [{"username": "ada", "role": "student"}, ...]}
+    ]}
+
+role is student (the default), teacher or admin.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from assignment.pending import rebuild_pending_assignments
+from core.versions import bump_classroom_versions, bump_user_versions
+from .counters import rebuild_member_counts
+from .models import Classroom, ClassroomMember
+
+BATCH_SIZE = 500
+ROLES = {
+    'student': ClassroomMember.Role.STUDENT,
+    'teacher': ClassroomMember.Role.TEACHER,
+    'admin': ClassroomMember.Role.ADMIN,
+}
+
+
+class RosterSyncError(Exception):
+    """The roster is malformed or names an unknown classroom; nothing was changed."""
+
+
+@dataclass
+class ClassroomDiff:
+    """The changes a roster makes to one classroom, as usernames."""
+    classroom: Classroom
+    added: list = field(default_factory=list)
+    reactivated: list = field(default_factory=list)
+    role_changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    unknown_users: list = field(default_factory=list)
+    changed_user_ids: set = field(default_factory=set, repr=False)
+
+    @property
+    def changed(self):
+        return bool(self.added or self.reactivated or self.role_changed or self.removed)
+
+    def as_dict(self):
+        return {
+            'classroom': self.classroom.slug,
+            'added': self.added,
+            'reactivated': self.reactivated,
+            'role_changed': self.role_changed,
+            'removed': self.removed,
+            'unknown_users': self.unknown_users,
+        }
+
+
+def parse_rosters(data):
+    """
+    Validate roster data (parsed JSON) and return a list of
+    (classroom reference, {username: role}) pairs.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('classrooms'), list):
+        raise RosterSyncError('Expected an object with a "classrooms" list.')
+    rosters = []
+    seen_classrooms = set()
+    for i, entry in enumerate(data['classrooms']):
+        if not isinstance(entry, dict) or not isinstance(entry.get('classroom'), str) or not isinstance(entry.get('members'), list):
+            raise RosterSyncError(f'classrooms[{i}] needs a "classroom" string and a "members" list.')
+        ref = entry['classroom'].strip().lower()
+        if ref in seen_classrooms:
+            raise RosterSyncError(f'Classroom "{ref}" is listed more than once.')
+        seen_classrooms.add(ref)
+        members = {}
+        for j, member in enumerate(entry['members']):
+            if not isinstance(member, dict) or not isinstance(member.get('username'), str):
+                raise RosterSyncError(f'classrooms[{i}].members[{j}] needs a "username" string.')
+            role = ROLES.get(str(member.get('role') or 'student').lower())
+            if role is None:
+                raise RosterSyncError(f'classrooms[{i}].members[{j}] has an unknown role.')
+            username = member['username'].strip()
+            if username in members:
+                raise RosterSyncError(f'"{username}" is listed more than once for classroom "{ref}".')
+            members[username] = role
+        rosters.append((ref, members))
+    return rosters
+
+
+def _resolve_classrooms(refs):
+    classrooms = {}
+    for classroom in Classroom.objects.filter(Q(course_code__in=refs) | Q(slug__in=refs)):
+        classrooms[classroom.course_code] = classrooms[classroom.slug] = classroom
+    unknown = [ref for ref in refs if ref not in classrooms]
+    if unknown:
+        raise RosterSyncError(f"Unknown classroom(s): {', '.join(unknown)}.")
+    return classrooms
+
+
+def sync_rosters(rosters, dry_run=False):
+    """
+    Apply rosters (as returned by parse_rosters) and return a ClassroomDiff
+    per classroom. With dry_run the diffs are computed but not applied.
+    Usernames that do not exist are reported and skipped.
+    """
+    classrooms = _resolve_classrooms([ref for ref, _ in rosters])
+    user_ids = dict(User.objects.filter(
+        username__in={username for _, members in rosters for username in members}
+    ).values_list('username', 'pk'))
+    usernames = {user_id: username for username, user_id in user_ids.items()}
+
+    diffs = []
+    new_members = []
+    updated_members = []
+    removed_pks = []
+    with transaction.atomic():
+        for ref, members in rosters:
+            classroom = classrooms[ref]
+            diff = ClassroomDiff(classroom, unknown_users=sorted(u for u in members if u not in user_ids))
+            desired = {user_ids[username]: role for username, role in members.items() if username in user_ids}
+
+            # user id -> (pk, role, is_active); one query per classroom
+            current = {}
+            for pk, user_id, username, role, is_active in ClassroomMember.objects.filter(
+                classroom=classroom
+            ).values_list('pk', 'user_id', 'user__username', 'role', 'is_active'):
+                current[user_id] = (pk, role, is_active)
+                usernames[user_id] = username
+            active = {user_id for user_id, (_, _, is_active) in current.items() if is_active}
+            added = desired.keys() - current.keys()
+            reactivated = (desired.keys() & current.keys()) - active
+            role_changed = {user_id for user_id in desired.keys() & active if current[user_id][1] != desired[user_id]}
+            removed = active - desired.keys() - {classroom.creator_id}
+
+            new_members += [
+                ClassroomMember(classroom=classroom, user_id=user_id, role=desired[user_id])
+                for user_id in added
+            ]
+            updated_members += [
+                ClassroomMember(pk=current[user_id][0], role=desired[user_id], is_active=True)
+                for user_id in reactivated | role_changed
+            ]
+            removed_pks += [current[user_id][0] for user_id in removed]
+
+            diff.changed_user_ids = added | reactivated | role_changed | removed
+            diff.added, diff.reactivated, diff.role_changed, diff.removed = (
+                sorted(usernames[user_id] for user_id in ids)
+                for ids in (added, reactivated, role_changed, removed)
+            )
+            diffs.append(diff)
+
+        if dry_run:
+            return diffs
+
+        ClassroomMember.objects.bulk_create(new_members, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        ClassroomMember.objects.bulk_update(updated_members, ['role', 'is_active'], batch_size=BATCH_SIZE)
+        ClassroomMember.objects.filter(pk__in=removed_pks).update(is_active=False)
+
+        # What the ClassroomMember signal handlers would do, once for the whole sync
+        changed = [diff for diff in diffs if diff.changed]
+        if changed:
+            classroom_ids = {diff.classroom.pk for diff in changed}
+            affected = set().union(*(diff.changed_user_ids for diff in changed))
+            rebuild_member_counts(classroom_ids)
+            rebuild_pending_assignments(affected)
+            bump_classroom_versions(classroom_ids)
+            bump_user_versions(affected)
+    return diffs
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core import activity
+from .models import ClassroomMember, Announcement
+from .counters import increment_member_count, rebuild_member_counts
+
+@receiver(post_save, sender=ClassroomMember)
+def update_member_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the classroom member counters in sync when a membership is created
+    or changes role or active status.
+    """
+    if raw:
+        return
+    if created:
+        if instance.is_active:
+            increment_member_count(instance.classroom_id, instance.role)
+    elif instance.membership_changed():
+        # Role changes are rare, so recount from the membership rows
+        # instead of risking a double decrement under concurrent edits
+        loaded_classroom_id = getattr(instance, '_loaded_classroom_id', instance.classroom_id)
+        rebuild_member_counts({loaded_classroom_id, instance.classroom_id})
+
+@receiver(post_delete, sender=ClassroomMember)
+def update_member_counts_on_delete(sender, instance, **kwargs):
+    """
+    Decrement the classroom member counter when an active membership is removed.
+    """
+    if instance.is_active:
+        increment_member_count(instance.classroom_id, instance.role, -1)
+
+@receiver(post_save, sender=Announcement)
+def record_announcement_activity(sender, instance, created, raw=False, **kwargs):
+    """
+    Put new announcements into the feeds of the classroom's members.
+    """
+    if created and not raw:
+        activity.record_announcements([instance])
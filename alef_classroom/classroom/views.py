@@ -1,14 +1,27 @@
+import json
+import secrets
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, JsonResponse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
 from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.db.models import F, FilteredRelation, Prefetch, Q
 
 from .models import Classroom, ClassroomMember, Announcement, Comment
+from .membership import get_membership, TEACHING_ROLES
 from .forms import ClassroomForm, ClassroomJoinForm, AnnouncementForm, CommentForm
+from .roster_sync import RosterSyncError, parse_rosters, sync_rosters
 from accounts.models import User
+from core.pagination import cursor_paginate
+from core.retry import retry_on_locked
+
+CLASSROOMS_PER_PAGE = 30
+ANNOUNCEMENTS_PER_PAGE = 10
 
 @login_required
 def classroom_list(request):
@@ -16,44 +29,42 @@ def classroom_list(request):
     Display a list of classrooms the user is enrolled in or has created.
     Admins can see all classrooms.
     """
-    # Admins can see all classrooms
-    if request.user.is_admin:
-        all_classrooms = Classroom.objects.filter(is_active=True).order_by('-created_at')
-        teaching_classrooms = all_classrooms
+    user = request.user
+    classrooms = Classroom.objects.filter(is_active=True)
+    
+    if not user.is_admin:
+        # A single LEFT JOIN resolves the user's role in each classroom
+        classrooms = classrooms.annotate(
+            user_membership=FilteredRelation('members', condition=Q(members__user=user)),
+        ).annotate(
+            user_role=F('user_membership__role'),
+        ).filter(
+            Q(creator=user) | Q(user_membership__is_active=True)
+        )
+    
+    # Page through classrooms newest first so large accounts stay bounded
+    page = cursor_paginate(
+        classrooms,
+        cursor=request.GET.get('cursor'),
+        ordering=('-created_at', '-pk'),
+        per_page=CLASSROOMS_PER_PAGE,
+    )
+    
+    if user.is_admin:
+        # Admins can see all classrooms
+        teaching_classrooms = page.items
         enrolled_classrooms = []
     else:
-        # Get classrooms where the user is a member
-        enrollments = ClassroomMember.objects.filter(user=request.user, is_active=True)
-        enrolled_classrooms = [enrollment.classroom for enrollment in enrollments]
-        
-        # Get classrooms created by the user that they might not be a member of
-        created_classrooms = Classroom.objects.filter(creator=request.user, is_active=True)
-        
-        # Combine and remove duplicates
-        all_classrooms = list(set(enrolled_classrooms + list(created_classrooms)))
-        
-        # Sort by creation date (newest first)
-        all_classrooms.sort(key=lambda x: x.created_at, reverse=True)
-        
         # Split into teaching and enrolled classes
         teaching_classrooms = []
         enrolled_classrooms = []
         
-        for classroom in all_classrooms:
+        for classroom in page:
             # The creator is always considered a teacher
-            if classroom.creator == request.user:
+            if classroom.creator_id == user.pk or classroom.user_role == ClassroomMember.Role.TEACHER:
                 teaching_classrooms.append(classroom)
             else:
-                # Check if the user is a teacher in this classroom
-                try:
-                    membership = ClassroomMember.objects.get(classroom=classroom, user=request.user)
-                    if membership.role == ClassroomMember.Role.TEACHER:
-                        teaching_classrooms.append(classroom)
-                    else:
-                        enrolled_classrooms.append(classroom)
-                except ClassroomMember.DoesNotExist:
-                    # This shouldn't happen, but just in case
-                    pass
+                enrolled_classrooms.append(classroom)
     
     # Form for joining a classroom
     join_form = ClassroomJoinForm()
@@ -61,12 +72,14 @@ def classroom_list(request):
     context = {
         'teaching_classrooms': teaching_classrooms,
         'enrolled_classrooms': enrolled_classrooms,
+        'page': page,
         'join_form': join_form,
     }
     
     return render(request, 'classroom/list.html', context)
 
 @login_required
+@retry_on_locked
 def classroom_create(request):
     """
     Create a new classroom.
@@ -98,41 +111,67 @@ def classroom_create(request):
     
     return render(request, 'classroom/create.html', {'form': form})
 
+def announcement_stream(classroom):
+    """
+    Announcements for a classroom with authors and comments (with their
+    authors) loaded in bulk for whichever rows are evaluated.
+    """
+    return Announcement.objects.filter(classroom=classroom).select_related('author').prefetch_related(
+        Prefetch('comments', queryset=Comment.objects.select_related('author'))
+    )
+
+def announcement_stream_page(classroom, cursor=None):
+    """
+    Return one page of the classroom's unpinned announcements, newest first.
+    """
+    return cursor_paginate(
+        announcement_stream(classroom).filter(is_pinned=False),
+        cursor=cursor,
+        ordering=('-created_at', '-pk'),
+        per_page=ANNOUNCEMENTS_PER_PAGE,
+    )
+
 @login_required
 def classroom_detail(request, pk):
     """
     Display a classroom and its announcements.
     """
-    classroom = get_object_or_404(Classroom, pk=pk, is_active=True)
+    classroom = get_object_or_404(Classroom.objects.select_related('creator'), pk=pk, is_active=True)
     
     # Check if the user is a member of this classroom
-    try:
-        membership = ClassroomMember.objects.get(classroom=classroom, user=request.user)
+    role = get_membership(request).role(classroom)
+    if role is not None:
         is_member = True
-        is_teacher = membership.role in [ClassroomMember.Role.TEACHER, ClassroomMember.Role.ADMIN]
-    except ClassroomMember.DoesNotExist:
+        is_teacher = role in TEACHING_ROLES
+    else:
         # User is not a member, but might be the creator or an admin
-        is_member = classroom.creator == request.user or request.user.is_admin
+        is_member = classroom.creator_id == request.user.pk or request.user.is_admin
         is_teacher = is_member  # Creator and admins are considered teachers
     
     if not is_member:
         return render(request, 'classroom/join_required.html', {'classroom': classroom})
     
-    # Get announcements for this classroom
-    announcements = Announcement.objects.filter(classroom=classroom)
+    # Pinned announcements always lead the stream; the rest is paginated
+    pinned_announcements = announcement_stream(classroom).filter(is_pinned=True).order_by('-created_at', '-pk')
+    announcement_page = announcement_stream_page(classroom)
     
     # Form for creating new announcements (only for teachers)
     announcement_form = AnnouncementForm() if is_teacher else None
     
-    # Get all members of the classroom, separated by role
-    members = ClassroomMember.objects.filter(classroom=classroom)
-    teachers = members.filter(role=ClassroomMember.Role.TEACHER)
-    students = members.filter(role=ClassroomMember.Role.STUDENT)
-    admins = members.filter(role=ClassroomMember.Role.ADMIN)
+    # Get all members of the classroom in one query, separated by role
+    teachers, students, admins = [], [], []
+    members_by_role = {
+        ClassroomMember.Role.TEACHER: teachers,
+        ClassroomMember.Role.STUDENT: students,
+        ClassroomMember.Role.ADMIN: admins,
+    }
+    for member in ClassroomMember.objects.filter(classroom=classroom, is_active=True).select_related('user'):
+        members_by_role[member.role].append(member)
     
     context = {
         'classroom': classroom,
-        'announcements': announcements,
+        'pinned_announcements': pinned_announcements,
+        'announcement_page': announcement_page,
         'announcement_form': announcement_form,
         'is_teacher': is_teacher,
         'teachers': teachers,
@@ -144,6 +183,27 @@ def classroom_detail(request, pk):
     return render(request, 'classroom/detail.html', context)
 
 @login_required
+def announcement_list(request, pk):
+    """
+    HTMX endpoint returning the next page of a classroom's announcements.
+    """
+    classroom = get_object_or_404(Classroom, pk=pk, is_active=True)
+    
+    is_member = (get_membership(request).is_member(classroom)
+                 or classroom.creator_id == request.user.pk or request.user.is_admin)
+    if not is_member:
+        return HttpResponseForbidden("You must be a member of this classroom to view announcements.")
+    
+    context = {
+        'classroom': classroom,
+        'page': announcement_stream_page(classroom, request.GET.get('cursor')),
+        'comment_form': CommentForm(),
+    }
+    
+    return render(request, 'classroom/announcement_page.html', context)
+
+@login_required
+@retry_on_locked
 def classroom_edit(request, pk):
     """
     Edit an existing classroom.
@@ -151,9 +211,8 @@ def classroom_edit(request, pk):
     classroom = get_object_or_404(Classroom, pk=pk)
     
     # Only the creator or teachers can edit the classroom
-    if request.user != classroom.creator and not ClassroomMember.objects.filter(
-        classroom=classroom, user=request.user, role=ClassroomMember.Role.TEACHER
-    ).exists():
+    if (request.user.pk != classroom.creator_id
+            and get_membership(request).role(classroom) != ClassroomMember.Role.TEACHER):
         return HttpResponseForbidden("You don't have permission to edit this classroom.")
     
     if request.method == 'POST':
@@ -168,6 +227,7 @@ def classroom_edit(request, pk):
     return render(request, 'classroom/edit.html', {'form': form, 'classroom': classroom})
 
 @login_required
+@retry_on_locked
 def classroom_delete(request, pk):
     """
     Delete a classroom.
@@ -186,7 +246,22 @@ def classroom_delete(request, pk):
     
     return render(request, 'classroom/delete.html', {'classroom': classroom})
 
+def enroll(classroom, user, role):
+    """
+    Add user to classroom with role, reactivating a membership that was
+    deactivated (for example by a roster sync) instead of duplicating it.
+    """
+    member, created = ClassroomMember.objects.get_or_create(
+        classroom=classroom, user=user, defaults={'role': role}
+    )
+    if not created:
+        member.role = role
+        member.is_active = True
+        member.save()
+    return member
+
 @login_required
+@retry_on_locked
 def classroom_join(request, pk=None):
     """
     Join a classroom using a course code or by direct link.
@@ -196,7 +271,7 @@ def classroom_join(request, pk=None):
         classroom = get_object_or_404(Classroom, pk=pk, is_active=True)
         
         # Check if already a member
-        if ClassroomMember.objects.filter(classroom=classroom, user=request.user).exists():
+        if get_membership(request).is_member(classroom):
             messages.info(request, "You are already a member of this classroom.")
             return redirect('classroom:detail', pk=classroom.pk)
         
@@ -208,11 +283,7 @@ def classroom_join(request, pk=None):
         else:
             role = ClassroomMember.Role.STUDENT
         
-        ClassroomMember.objects.create(
-            classroom=classroom,
-            user=request.user,
-            role=role
-        )
+        enroll(classroom, request.user, role)
         
         messages.success(request, f"You have joined {classroom.name}!")
         return redirect('classroom:detail', pk=classroom.pk)
@@ -223,20 +294,16 @@ def classroom_join(request, pk=None):
         if form.is_valid():
             course_code = form.cleaned_data['course_code']
             
-            # Try case-insensitive matching (course_code is cleaned by form - whitespace stripped)
+            # Course codes are stored in lowercase and the form lowercases the
+            # input, so an exact match (which uses the unique index) is enough
             try:
-                # Try case-insensitive match (SQLite supports this)
-                classroom = Classroom.objects.get(course_code__iexact=course_code, is_active=True)
+                classroom = Classroom.objects.get(course_code=course_code, is_active=True)
             except Classroom.DoesNotExist:
-                # If case-insensitive doesn't work, try exact match
-                try:
-                    classroom = Classroom.objects.get(course_code=course_code, is_active=True)
-                except Classroom.DoesNotExist:
-                    messages.error(request, "Invalid course code. Please try again.")
-                    return redirect('classroom:list')
+                messages.error(request, "Invalid course code. Please try again.")
+                return redirect('classroom:list')
             
             # Check if already a member
-            if ClassroomMember.objects.filter(classroom=classroom, user=request.user).exists():
+            if get_membership(request).is_member(classroom):
                 messages.info(request, "You are already a member of this classroom.")
                 return redirect('classroom:detail', pk=classroom.pk)
             
@@ -248,18 +315,55 @@ def classroom_join(request, pk=None):
             else:
                 role = ClassroomMember.Role.STUDENT
             
-            ClassroomMember.objects.create(
-                classroom=classroom,
-                user=request.user,
-                role=role
-            )
+            enroll(classroom, request.user, role)
             
             messages.success(request, f"You have joined {classroom.name}!")
             return redirect('classroom:detail', pk=classroom.pk)
     
     return redirect('classroom:list')
 
+def _has_roster_sync_token(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and secrets.compare_digest(
+        token.strip().encode(), settings.ROSTER_SYNC_TOKEN.encode()
+    )
+
+@csrf_exempt
+@retry_on_locked
+def roster_sync(request):
+    """
+    Sync classroom memberships to the rosters POSTed as JSON by a student
+    information system (see classroom.roster_sync for the format). Clients
+    authenticate with "Authorization: Bearer <ROSTER_SYNC_TOKEN>" instead
+    of a session, so there is no CSRF token to send. ?dry_run=1 returns
+    the changes without applying them.
+    """
+    if not settings.ROSTER_SYNC_TOKEN:
+        return JsonResponse({'error': "Roster sync is not enabled."}, status=404)
+    if not _has_roster_sync_token(request):
+        response = JsonResponse({'error': "A valid bearer token is required."}, status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    if request.method != 'POST':
+        return JsonResponse({'error': "POST the rosters as JSON."}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': "The request body is not valid JSON."}, status=400)
+    dry_run = request.GET.get('dry_run') == '1'
+    try:
+        diffs = sync_rosters(parse_rosters(data), dry_run=dry_run)
+    except RosterSyncError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'dry_run': dry_run,
+        'classrooms': [diff.as_dict() for diff in diffs],
+    })
+
 @login_required
+@retry_on_locked
 def announcement_create(request, classroom_pk):
     """
     Create a new announcement in a classroom.
@@ -267,9 +371,8 @@ def announcement_create(request, classroom_pk):
     classroom = get_object_or_404(Classroom, pk=classroom_pk, is_active=True)
     
     # Check if the user is a teacher in this classroom
-    is_teacher = classroom.creator == request.user or ClassroomMember.objects.filter(
-        classroom=classroom, user=request.user, role=ClassroomMember.Role.TEACHER
-    ).exists()
+    is_teacher = (classroom.creator_id == request.user.pk
+                  or get_membership(request).role(classroom) == ClassroomMember.Role.TEACHER)
     
     if not is_teacher:
         return HttpResponseForbidden("Only teachers can post announcements.")
@@ -288,6 +391,7 @@ def announcement_create(request, classroom_pk):
     return redirect('classroom:detail', pk=classroom.pk)
 
 @login_required
+@retry_on_locked
 def comment_create(request, announcement_pk):
     """
     Create a new comment on an announcement.
@@ -296,9 +400,7 @@ def comment_create(request, announcement_pk):
     classroom = announcement.classroom
     
     # Check if the user is a member of this classroom
-    is_member = classroom.creator == request.user or ClassroomMember.objects.filter(
-        classroom=classroom, user=request.user
-    ).exists()
+    is_member = classroom.creator_id == request.user.pk or get_membership(request).is_member(classroom)
     
     if not is_member:
         return HttpResponseForbidden("You must be a member of this classroom to comment.")
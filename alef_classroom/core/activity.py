@@ -0,0 +1,231 @@
+"""
+Fan-out-on-write activity feeds.
+
+Each interesting action is stored once as an ActivityEvent and copied into
+the FeedEntry table for every user who should see it, so that reading a
+feed is one indexed range scan. Every record_* function takes a batch of
+objects and writes all of its events and feed entries with bulk inserts;
+code that bypasses model signals (bulk_create, queryset.update) must call
+them itself.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from assignment.models import Assignment, AssignmentSubmission
+from classroom.models import Announcement, Classroom, ClassroomMember
+from classroom.membership import TEACHING_ROLES
+from .models import ActivityEvent, FeedEntry
+from .pagination import cursor_paginate
+from .versions import bump_user_versions
+
+BATCH_SIZE = 1000
+FEED_ORDERING = ('-created_at', '-pk')
+
+
+def display_name(user):
+    return user.get_full_name() or user.username
+
+
+def _related(objects, field_name, model):
+    """
+    Return {pk: instance} for the objects' field_name relation, using the
+    cached instances where present and one query for the rest.
+    """
+    descriptor = getattr(type(objects[0]), field_name)
+    found = {}
+    missing = set()
+    for obj in objects:
+        if descriptor.is_cached(obj):
+            related = getattr(obj, field_name)
+            found[related.pk] = related
+        else:
+            missing.add(getattr(obj, f'{field_name}_id'))
+    missing -= found.keys()
+    if missing:
+        found.update(model.objects.in_bulk(missing))
+    return found
+
+
+def _members_by_classroom(classroom_ids, roles):
+    """Map classroom id to the ids of its active members holding one of roles."""
+    members = {classroom_id: set() for classroom_id in classroom_ids}
+    rows = ClassroomMember.objects.filter(
+        classroom_id__in=classroom_ids, role__in=roles, is_active=True
+    ).values_list('classroom_id', 'user_id')
+    for classroom_id, user_id in rows:
+        members[classroom_id].add(user_id)
+    return members
+
+
+def _staff_by_classroom(classroom_ids):
+    """Teachers of each classroom: teaching members plus the creator."""
+    staff = _members_by_classroom(classroom_ids, TEACHING_ROLES)
+    for classroom_id, creator_id in Classroom.objects.filter(pk__in=classroom_ids).values_list('pk', 'creator_id'):
+        staff[classroom_id].add(creator_id)
+    return staff
+
+
+def publish(events):
+    """
+    Store (event, recipient ids) pairs: one bulk insert for the events and
+    one for all of their feed entries. Events without recipients are dropped.
+    """
+    events = [(event, set(recipients)) for event, recipients in events if recipients]
+    if not events:
+        return []
+    with transaction.atomic():
+        ActivityEvent.objects.bulk_create([event for event, _ in events], batch_size=BATCH_SIZE)
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=user_id, event=event, created_at=event.created_at)
+                for event, recipients in events
+                for user_id in recipients
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    bump_user_versions(set().union(*(recipients for _, recipients in events)))
+    return [event for event, _ in events]
+
+
+def record_submissions(submissions):
+    """Tell each classroom's teachers about new submissions."""
+    submissions = list(submissions)
+    if not submissions:
+        return []
+    assignments = _related(submissions, 'assignment', Assignment)
+    students = _related(submissions, 'student', get_user_model())
+    staff = _staff_by_classroom({assignment.classroom_id for assignment in assignments.values()})
+
+    events = []
+    for submission in submissions:
+        assignment = assignments[submission.assignment_id]
+        student = students[submission.student_id]
+        late = ' (late)' if submission.is_late else ''
+        events.append((ActivityEvent(
+            verb=ActivityEvent.Verb.SUBMISSION,
+            actor=student,
+            classroom_id=assignment.classroom_id,
+            assignment=assignment,
+            title=f"Submitted: {assignment.title}",
+            description=f"{display_name(student)} submitted {assignment.title}{late}",
+            created_at=submission.submitted_at or timezone.now(),
+        ), staff[assignment.classroom_id] - {student.pk}))
+    return publish(events)
+
+
+def record_grades(submissions):
+    """Tell students that their submissions were graded."""
+    submissions = [submission for submission in submissions if submission.is_graded]
+    if not submissions:
+        return []
+    assignments = _related(submissions, 'assignment', Assignment)
+
+    events = []
+    for submission in submissions:
+        assignment = assignments[submission.assignment_id]
+        events.append((ActivityEvent(
+            verb=ActivityEvent.Verb.GRADE,
+            actor_id=submission.graded_by_id or assignment.created_by_id,
+            classroom_id=assignment.classroom_id,
+            assignment=assignment,
+            title=f"Graded: {assignment.title}",
+            description=f"You received {submission.points_earned}/{assignment.points_possible} on {assignment.title}",
+            created_at=submission.graded_at or timezone.now(),
+        ), {submission.student_id}))
+    return publish(events)
+
+
+def record_assignments(assignments, backfill=False):
+    """
+    Tell students about newly visible assignments. Assignments that were
+    already announced (e.g. unpublished and published again) are skipped.
+    Events are dated now, or at the assignment's creation when backfilling.
+    """
+    assignments = list(assignments)
+    if not assignments:
+        return []
+    announced = set(ActivityEvent.objects.filter(
+        verb=ActivityEvent.Verb.ASSIGNMENT,
+        assignment__in=assignments,
+    ).values_list('assignment_id', flat=True))
+    assignments = [assignment for assignment in assignments if assignment.pk not in announced]
+    if not assignments:
+        return []
+    classrooms = _related(assignments, 'classroom', Classroom)
+    students = _members_by_classroom(classrooms.keys(), [ClassroomMember.Role.STUDENT])
+
+    events = []
+    for assignment in assignments:
+        events.append((ActivityEvent(
+            verb=ActivityEvent.Verb.ASSIGNMENT,
+            actor_id=assignment.created_by_id,
+            classroom_id=assignment.classroom_id,
+            assignment=assignment,
+            title=f"New assignment: {assignment.title}",
+            description=f"New assignment in {classrooms[assignment.classroom_id].name}",
+            created_at=assignment.created_at if backfill else timezone.now(),
+        ), students[assignment.classroom_id]))
+    return publish(events)
+
+
+def record_announcements(announcements):
+    """Tell every member of the classroom about new announcements."""
+    announcements = list(announcements)
+    if not announcements:
+        return []
+    classrooms = _related(announcements, 'classroom', Classroom)
+    authors = _related(announcements, 'author', get_user_model())
+    members = _members_by_classroom(classrooms.keys(), ClassroomMember.Role.values)
+    for classroom in classrooms.values():
+        members[classroom.pk].add(classroom.creator_id)
+
+    events = []
+    for announcement in announcements:
+        classroom = classrooms[announcement.classroom_id]
+        author = authors[announcement.author_id]
+        events.append((ActivityEvent(
+            verb=ActivityEvent.Verb.ANNOUNCEMENT,
+            actor=author,
+            classroom=classroom,
+            title=f"Announcement: {announcement.title}",
+            description=f"{display_name(author)} posted in {classroom.name}",
+            created_at=announcement.created_at or timezone.now(),
+        ), members[classroom.pk] - {author.pk}))
+    return publish(events)
+
+
+def feed_page(user, cursor=None, per_page=10):
+    """Return a CursorPage of the user's feed entries, newest first."""
+    entries = FeedEntry.objects.filter(user=user).select_related('event', 'event__actor')
+    return cursor_paginate(entries, cursor, ordering=FEED_ORDERING, per_page=per_page)
+
+
+def rebuild_activity_feed():
+    """
+    Discard every event and feed entry and record them again from the
+    current assignments, announcements, submissions and grades.
+    Returns the number of events written.
+    """
+    sources = [
+        (
+            lambda batch: record_assignments(batch, backfill=True),
+            Assignment.objects.filter(is_published=True, is_draft=False).select_related('classroom'),
+        ),
+        (record_announcements, Announcement.objects.select_related('classroom', 'author')),
+        (record_submissions, AssignmentSubmission.objects.select_related('assignment', 'student')),
+        (record_grades, AssignmentSubmission.objects.filter(is_graded=True).select_related('assignment')),
+    ]
+    written = 0
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        ActivityEvent.objects.all().delete()
+        for record, queryset in sources:
+            batch = []
+            for obj in queryset.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) >= BATCH_SIZE:
+                    written += len(record(batch))
+                    batch = []
+            written += len(record(batch))
+    return written
@@ -1,16 +1,44 @@
+import io
+
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import Count
 from django.http import HttpResponseForbidden
 from accounts.models import User, TeacherProfile, StudentProfile
+from accounts.roster_import import RosterError, import_roster
 from classroom.models import Classroom, ClassroomMember
 from assignment.models import Assignment, AssignmentSubmission
+from .statistics import get_site_statistics
+from .pagination import cursor_paginate, page_query
+from .csv_export import stream_csv
+from .routers import use_replica
+
+ADMIN_PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 2000
+MAX_SHOWN_IMPORT_ERRORS = 200
 
 def is_admin(user):
     """Check if user is an admin."""
     return user.is_authenticated and user.role == User.Role.ADMIN
 
+def paginated_context(request, queryset, ordering):
+    """
+    Keyset-paginate an admin listing and return the template context for it.
+    """
+    page = cursor_paginate(queryset, request.GET.get('cursor'), ordering, ADMIN_PAGE_SIZE)
+    export_params = request.GET.copy()
+    export_params.pop('cursor', None)
+    export_params['export'] = 'csv'
+    return {
+        'page': page,
+        'first_page_query': page_query(request, None),
+        'next_page_query': page_query(request, page.next_cursor) if page.has_next else None,
+        'export_query': export_params.urlencode(),
+    }
+
 @login_required
+@use_replica
 def admin_dashboard(request):
     """
     Admin dashboard for supervising all classrooms, users, and submissions.
@@ -19,38 +47,16 @@ def admin_dashboard(request):
         messages.error(request, "You don't have permission to access this page.")
         return HttpResponseForbidden("Access Denied")
     
-    # Get statistics
-    total_users = User.objects.count()
-    total_teachers = User.objects.filter(role=User.Role.TEACHER).count()
-    total_students = User.objects.filter(role=User.Role.STUDENT).count()
-    total_admins = User.objects.filter(role=User.Role.ADMIN).count()
-    
-    total_classrooms = Classroom.objects.count()
-    active_classrooms = Classroom.objects.filter(is_active=True).count()
-    archived_classrooms = Classroom.objects.filter(is_archived=True).count()
-    
-    total_assignments = Assignment.objects.count()
-    total_submissions = AssignmentSubmission.objects.count()
-    graded_submissions = AssignmentSubmission.objects.filter(is_graded=True).count()
-    pending_submissions = AssignmentSubmission.objects.filter(is_graded=False).count()
+    # Get statistics from the cached snapshot (?refresh=1 recomputes it)
+    stats = get_site_statistics(refresh=request.GET.get('refresh') == '1')
     
     # Get recent activity
-    recent_classrooms = Classroom.objects.all().order_by('-created_at')[:5]
-    recent_assignments = Assignment.objects.all().order_by('-created_at')[:5]
-    recent_submissions = AssignmentSubmission.objects.all().order_by('-submitted_at')[:5]
+    recent_classrooms = Classroom.objects.select_related('creator').order_by('-created_at')[:5]
+    recent_assignments = Assignment.objects.select_related('classroom').order_by('-created_at')[:5]
+    recent_submissions = AssignmentSubmission.objects.select_related('student', 'assignment').order_by('-submitted_at')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_teachers': total_teachers,
-        'total_students': total_students,
-        'total_admins': total_admins,
-        'total_classrooms': total_classrooms,
-        'active_classrooms': active_classrooms,
-        'archived_classrooms': archived_classrooms,
-        'total_assignments': total_assignments,
-        'total_submissions': total_submissions,
-        'graded_submissions': graded_submissions,
-        'pending_submissions': pending_submissions,
+        **stats,
         'recent_classrooms': recent_classrooms,
         'recent_assignments': recent_assignments,
         'recent_submissions': recent_submissions,
@@ -59,6 +65,7 @@ def admin_dashboard(request):
     return render(request, 'admin/dashboard.html', context)
 
 @login_required
+@use_replica
 def admin_users(request):
     """
     Admin page to view and manage all users.
@@ -67,22 +74,33 @@ def admin_users(request):
         messages.error(request, "You don't have permission to access this page.")
         return HttpResponseForbidden("Access Denied")
     
-    users = User.objects.all().order_by('-date_joined')
+    users = User.objects.all()
     
     # Filter by role if specified
     role_filter = request.GET.get('role')
     if role_filter:
         users = users.filter(role=role_filter)
     
-    context = {
-        'users': users,
+    if request.GET.get('export') == 'csv':
+        rows = (
+            (user.username, user.get_full_name(), user.email, user.role,
+             user.is_active, user.is_verified, user.date_joined.isoformat())
+            for user in users.order_by('-date_joined', '-pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ('username', 'full_name', 'email', 'role', 'is_active', 'is_verified', 'date_joined')
+        return stream_csv('users.csv', header, rows)
+    
+    context = paginated_context(request, users, ('-date_joined', '-pk'))
+    context.update({
+        'users': context['page'].items,
         'role_filter': role_filter,
         'roles': User.Role.choices,
-    }
+    })
     
     return render(request, 'admin/users.html', context)
 
 @login_required
+@use_replica
 def admin_classrooms(request):
     """
     Admin page to view and manage all classrooms.
@@ -91,7 +109,7 @@ def admin_classrooms(request):
         messages.error(request, "You don't have permission to access this page.")
         return HttpResponseForbidden("Access Denied")
     
-    classrooms = Classroom.objects.all().order_by('-created_at')
+    classrooms = Classroom.objects.select_related('creator')
     
     # Filter by status if specified
     status_filter = request.GET.get('status')
@@ -102,14 +120,28 @@ def admin_classrooms(request):
     elif status_filter == 'inactive':
         classrooms = classrooms.filter(is_active=False)
     
-    context = {
-        'classrooms': classrooms,
+    if request.GET.get('export') == 'csv':
+        rows = (
+            (classroom.name, classroom.subject or '', classroom.section or '', classroom.creator.username,
+             classroom.course_code, classroom.student_count, classroom.teacher_count,
+             classroom.is_active, classroom.is_archived, classroom.created_at.isoformat())
+            for classroom in classrooms.order_by('-created_at', '-pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ('name', 'subject', 'section', 'creator', 'course_code', 'students', 'teachers',
+                  'is_active', 'is_archived', 'created_at')
+        return stream_csv('classrooms.csv', header, rows)
+    
+    classrooms = classrooms.annotate(member_count=Count('members'))
+    context = paginated_context(request, classrooms, ('-created_at', '-pk'))
+    context.update({
+        'classrooms': context['page'].items,
         'status_filter': status_filter,
-    }
+    })
     
     return render(request, 'admin/classrooms.html', context)
 
 @login_required
+@use_replica
 def admin_submissions(request):
     """
     Admin page to view and manage all submissions.
@@ -118,7 +150,9 @@ def admin_submissions(request):
         messages.error(request, "You don't have permission to access this page.")
         return HttpResponseForbidden("Access Denied")
     
-    submissions = AssignmentSubmission.objects.all().order_by('-submitted_at')
+    submissions = AssignmentSubmission.objects.select_related(
+        'student', 'assignment__classroom', 'graded_by'
+    )
     
     # Filter by grading status if specified
     grading_filter = request.GET.get('grading')
@@ -134,10 +168,67 @@ def admin_submissions(request):
     elif late_filter == 'on_time':
         submissions = submissions.filter(is_late=False)
     
-    context = {
-        'submissions': submissions,
+    if request.GET.get('export') == 'csv':
+        rows = (
+            (submission.student.username, submission.assignment.title, submission.assignment.classroom.name,
+             submission.submitted_at.isoformat(), submission.is_graded, submission.is_late,
+             submission.points_earned if submission.is_graded else '', submission.assignment.points_possible,
+             submission.graded_by.username if submission.graded_by else '')
+            for submission in submissions.order_by('-submitted_at', '-pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        header = ('student', 'assignment', 'classroom', 'submitted_at', 'is_graded', 'is_late',
+                  'points_earned', 'points_possible', 'graded_by')
+        return stream_csv('submissions.csv', header, rows)
+    
+    context = paginated_context(request, submissions, ('-submitted_at', '-pk'))
+    context.update({
+        'submissions': context['page'].items,
         'grading_filter': grading_filter,
         'late_filter': late_filter,
-    }
+    })
     
     return render(request, 'admin/submissions.html', context)
+
+@login_required
+def admin_import_roster(request):
+    """
+    Admin page to create users and enroll them in classrooms from a roster
+    CSV file (see accounts.roster_import for the columns).
+    """
+    if not is_admin(request.user):
+        messages.error(request, "You don't have permission to access this page.")
+        return HttpResponseForbidden("Access Denied")
+    
+    result = None
+    classroom_ref = request.POST.get('classroom', '').strip()
+    if request.method == 'POST':
+        upload = request.FILES.get('roster')
+        classroom = None
+        if classroom_ref:
+            ref = classroom_ref.lower()
+            classroom = Classroom.objects.filter(course_code=ref).first() or Classroom.objects.filter(slug=ref).first()
+        if not upload:
+            messages.error(request, "Choose a CSV file to import.")
+        elif classroom_ref and classroom is None:
+            messages.error(request, f"Unknown classroom '{classroom_ref}'.")
+        else:
+            # Read the upload as a text stream; it is never loaded whole
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_roster(stream, classroom)
+            except (RosterError, UnicodeDecodeError) as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f"Imported {result.created_users} new users and {result.enrolled} memberships "
+                    f"from {result.rows} rows."
+                )
+    
+    context = {
+        'result': result,
+        'errors': result.errors[:MAX_SHOWN_IMPORT_ERRORS] if result else [],
+        'classroom_ref': classroom_ref,
+    }
+    
+    return render(request, 'admin/import_roster.html', context)
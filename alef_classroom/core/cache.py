@@ -0,0 +1,268 @@
+"""
+Two-tier cache backend.
+
+L1 is a small in-process LRU with a short TTL; L2 is the shared cache every
+worker sees (Redis in multi-process deployments; in development it may be
+in-process memory or a file-based cache). Reads are served from L1 when
+possible and fall back to L2; writes go to L2 first and then to L1.
+
+Other workers' L1 copies are not invalidated on write; they expire after
+L1_TIMEOUT seconds. Data that must never be stale across workers is kept
+correct with version stamps instead (see core.versions): the version keys
+themselves bypass L1 and are always read from L2, and entries that embed the
+versions they were built from can safely be served from L1.
+
+Configuration::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredCache',
+            'OPTIONS': {
+                'L2': 'shared',                # alias of the shared cache
+                'L1_MAX_ENTRIES': 1000,
+                'L1_TIMEOUT': 5,
+                'L1_BYPASS_PREFIXES': ['version:'],
+            },
+        },
+        'shared': {...},
+    }
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_BYPASS_PREFIXES = ('version:', 'django.contrib.sessions')
+
+# One L1 store and one set of counters per cache alias, shared by every
+# thread of the process (Django creates cache objects per thread)
+_stores = {}
+_stats = {}
+_stores_lock = threading.Lock()
+
+
+class TierStats:
+    """Hit and miss counters for one cache tier (approximate under threads)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit, count=1):
+        if hit:
+            self.hits += count
+        else:
+            self.misses += count
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class LRUStore:
+    """
+    A bounded, thread-safe LRU of pickled values with per-entry expiry.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+        return True, pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend serving reads from an in-process LRU in front of a shared
+    cache. See the module docstring for configuration.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.bypass_prefixes = tuple(options.get('L1_BYPASS_PREFIXES', DEFAULT_BYPASS_PREFIXES))
+        with _stores_lock:
+            if name not in _stores:
+                _stores[name] = LRUStore(options.get('L1_MAX_ENTRIES', 1000))
+                _stats[name] = {'l1': TierStats(), 'l2': TierStats()}
+            self.l1 = _stores[name]
+            self.tier_stats = _stats[name]
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_key(self, key, version):
+        if key.startswith(self.bypass_prefixes):
+            return None
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        return key
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+
+    def _remember(self, key, value, timeout, version):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            l1_timeout = self._l1_timeout(timeout)
+            if l1_timeout > 0:
+                self.l1.set(l1_key, value, l1_timeout)
+
+    def _forget(self, key, version):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            self.l1.delete(l1_key)
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            found, value = self.l1.get(l1_key)
+            self.tier_stats['l1'].record(found)
+            if found:
+                return value
+        missing = object()
+        value = self.l2.get(key, missing, version=version)
+        self.tier_stats['l2'].record(value is not missing)
+        if value is missing:
+            return default
+        if l1_key is not None:
+            # Unknown remaining L2 lifetime: keep the L1 copy for the short TTL
+            self.l1.set(l1_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            l1_key = self._l1_key(key, version)
+            if l1_key is not None:
+                hit, value = self.l1.get(l1_key)
+                self.tier_stats['l1'].record(hit)
+                if hit:
+                    found[key] = value
+                    continue
+            remaining.append(key)
+        if remaining:
+            from_l2 = self.l2.get_many(remaining, version=version)
+            self.tier_stats['l2'].record(True, len(from_l2))
+            self.tier_stats['l2'].record(False, len(remaining) - len(from_l2))
+            for key, value in from_l2.items():
+                self._remember(key, value, self.l1_timeout, version)
+            found.update(from_l2)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._remember(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key in failed:
+                self._forget(key, version)
+            else:
+                self._remember(key, value, timeout, version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._remember(key, value, timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        return self.l2.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.l2.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None and self.l1.get(l1_key)[0]:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in L2 only so every worker sees the same value
+        self._forget(key, version)
+        return self.l2.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.l2.decr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def stats(self):
+        """Per-tier hit and miss counters for this process."""
+        return {
+            'l1': {**self.tier_stats['l1'].as_dict(), 'entries': len(self.l1), 'max_entries': self.l1.max_entries},
+            'l2': {**self.tier_stats['l2'].as_dict(), 'backend': type(self.l2).__name__},
+        }
+
+
+def cache_stats():
+    """
+    Return per-tier statistics for every TieredCache, keyed by alias.
+    Other backends are reported by name only.
+    """
+    stats = {}
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        stats[alias] = backend.stats() if isinstance(backend, TieredCache) else {'backend': type(backend).__name__}
+    return stats
@@ -0,0 +1,122 @@
+"""
+Versioned per-user cache of the dashboard.
+
+A cached dashboard remembers the version of its user and of every classroom
+it was computed from (see core.versions). Serving it costs three cache reads
+and no queries; it is recomputed only after one of those versions has been
+bumped, which the signal handlers in core.signals do for the affected users
+and classrooms only.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from classroom.models import Classroom, ClassroomMember
+from assignment.models import Assignment, PendingAssignment
+from .activity import feed_page
+from .versions import get_user_version, get_classroom_versions, version_timestamp
+
+ACTIVITY_PER_PAGE = 10
+DASHBOARD_CACHE_KEY = 'dashboard:{}'
+
+
+def _shows_created_classrooms(user):
+    # Teachers and admins see classes they created, students the ones they joined
+    return user.is_teacher or user.is_admin
+
+
+def dashboard_classroom_ids(user):
+    """The classrooms whose changes can alter the user's dashboard."""
+    if _shows_created_classrooms(user):
+        return list(Classroom.objects.filter(creator=user).values_list('pk', flat=True))
+    return list(ClassroomMember.objects.filter(user=user, is_active=True).values_list('classroom_id', flat=True))
+
+
+def compute_dashboard_context(user):
+    """Everything the dashboard shows for a user, straight from the database."""
+    # Get classroom statistics
+    if _shows_created_classrooms(user):
+        classroom_count = Classroom.objects.filter(creator=user).count()
+        assignment_count = Assignment.objects.filter(created_by=user).count()
+    else:
+        classroom_count = ClassroomMember.objects.filter(user=user, is_active=True).count()
+        # Count pending assignments for students from the materialized to-do table
+        assignment_count = PendingAssignment.objects.filter(student=user).count()
+    
+    # Get recent classrooms
+    if _shows_created_classrooms(user):
+        recent_classrooms = list(Classroom.objects.filter(creator=user).order_by('-created_at')[:5])
+    else:
+        memberships = ClassroomMember.objects.filter(user=user, is_active=True).select_related('classroom').order_by('-joined_at')[:5]
+        recent_classrooms = [membership.classroom for membership in memberships]
+    
+    # Recent activity comes from the user's precomputed feed
+    activity_page = feed_page(user, per_page=ACTIVITY_PER_PAGE)
+    
+    return {
+        'classroom_count': classroom_count,
+        'assignment_count': assignment_count,
+        'recent_classrooms': recent_classrooms,
+        'activity_page': activity_page,
+    }
+
+
+class Dashboard:
+    """
+    A user's dashboard context with the data versions it was computed from.
+    """
+    def __init__(self, context, user_version, classroom_versions):
+        self.context = context
+        self.user_version = user_version
+        self.classroom_versions = classroom_versions
+
+    @property
+    def latest_version(self):
+        return max([self.user_version, *self.classroom_versions.values()])
+
+    @property
+    def version(self):
+        """Changes whenever any of the underlying versions is bumped."""
+        return f'{self.user_version}.{self.latest_version}.{len(self.classroom_versions)}'
+
+    @property
+    def last_modified(self):
+        return version_timestamp(self.latest_version)
+
+    def template_context(self):
+        """The context plus what the {% cache %} fragments are keyed on."""
+        return {
+            **self.context,
+            'dashboard_version': self.version,
+            'dashboard_cache_ttl': settings.DASHBOARD_CACHE_TTL,
+        }
+
+    def is_current(self, user_id):
+        return (
+            get_user_version(user_id) == self.user_version
+            and get_classroom_versions(self.classroom_versions) == self.classroom_versions
+        )
+
+
+def get_dashboard(user):
+    """Return the user's Dashboard, from the cache when it is still current."""
+    key = DASHBOARD_CACHE_KEY.format(user.pk)
+    dashboard = cache.get(key)
+    if dashboard is not None and dashboard.is_current(user.pk):
+        return dashboard
+    
+    # Read the versions before the data so a change made while computing
+    # leaves the entry stale instead of tagging old data as current
+    user_version = get_user_version(user.pk)
+    classroom_versions = get_classroom_versions(dashboard_classroom_ids(user))
+    dashboard = Dashboard(compute_dashboard_context(user), user_version, classroom_versions)
+    cache.set(key, dashboard, settings.DASHBOARD_CACHE_TTL)
+    return dashboard
+
+
+def get_request_dashboard(request):
+    """Return the current user's Dashboard, looked up at most once per request."""
+    dashboard = getattr(request, '_dashboard', None)
+    if dashboard is None:
+        dashboard = get_dashboard(request.user)
+        request._dashboard = dashboard
+    return dashboard
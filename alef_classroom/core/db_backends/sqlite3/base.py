@@ -0,0 +1,57 @@
+"""
+SQLite backend tuned for several concurrent worker processes.
+
+Extra OPTIONS understood on top of the stock backend:
+
+- ``pragmas``: a dict of PRAGMA name -> value applied to every new
+  connection, merged over DEFAULT_PRAGMAS. A value of None leaves that
+  pragma at SQLite's default.
+- ``transaction_mode``: DEFERRED, IMMEDIATE or EXCLUSIVE. With IMMEDIATE,
+  atomic blocks take the write lock when they begin, so a transaction that
+  cannot get the lock waits (busy_timeout) or fails before doing any work
+  instead of failing halfway through on its first write.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# Applied in order: busy_timeout must be set before switching the journal
+# mode, which itself needs a lock
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop('transaction_mode', None)
+        if self.transaction_mode is not None:
+            self.transaction_mode = self.transaction_mode.upper()
+            if self.transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f"settings.DATABASES transaction_mode must be one of {', '.join(TRANSACTION_MODES)}."
+                )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if value is None:
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
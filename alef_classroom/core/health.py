@@ -2,11 +2,14 @@
 Health check utilities for the application.
 """
 
-import os
 import psutil
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from .cache import cache_stats
+from .retry import lock_contention_stats
+from .routers import REPLICA_ALIAS, replica_configured
 
 
 @csrf_exempt
@@ -50,18 +53,55 @@ def health_check(request):
         }
         health_data['status'] = 'unhealthy'
     
-    # Check Redis connection
-    try:
-        import redis
-        r = redis.Redis.from_url(os.environ.get('REDIS_URL', 'redis://redis:6379/0'))
-        r.ping()
-        health_data['checks']['redis'] = {'status': 'ok'}
-    except Exception as e:
-        health_data['checks']['redis'] = {
-            'status': 'error',
-            'error': str(e)
+    # Check the read replica (only when configured); the reporting views
+    # depend on it but everything else keeps working on the primary
+    if replica_configured():
+        try:
+            from django.db import connections
+            with connections[REPLICA_ALIAS].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            health_data['checks']['database_replica'] = {'status': 'ok'}
+        except Exception as e:
+            health_data['checks']['database_replica'] = {
+                'status': 'warning',
+                'error': str(e)
+            }
+
+    # Check Redis connection (only used as the shared cache when configured)
+    if settings.REDIS_URL:
+        try:
+            import redis
+            r = redis.Redis.from_url(settings.REDIS_URL)
+            r.ping()
+            health_data['checks']['redis'] = {'status': 'ok'}
+        except Exception as e:
+            health_data['checks']['redis'] = {
+                'status': 'error',
+                'error': str(e)
+            }
+            health_data['status'] = 'unhealthy'
+    
+    # Queued submissions waiting for the ingest_submissions writer; a growing
+    # backlog means the writer is not running or cannot keep up
+    if settings.SUBMISSION_INGESTION_MODE == 'queued':
+        from assignment.ingestion import queue_stats
+        queue = queue_stats()
+        health_data['checks']['submission_queue'] = {
+            'status': 'ok' if queue['oldest_age_seconds'] < 60 else 'warning',
+            **queue,
         }
-        health_data['status'] = 'unhealthy'
+    
+    # SQLite write-lock contention seen by this worker process
+    health_data['checks']['database_locks'] = {
+        'status': 'ok',
+        **lock_contention_stats(),
+    }
+    
+    # Per-tier cache hit/miss counters for this worker process
+    health_data['checks']['cache'] = {
+        'status': 'ok',
+        'tiers': cache_stats(),
+    }
     
     # Determine overall status
     if any(check.get('status') == 'error' for check in health_data['checks'].values()):
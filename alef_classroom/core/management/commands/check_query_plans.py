@@ -0,0 +1,144 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, FilteredRelation, Q
+
+from accounts.models import User
+from classroom.models import Classroom, ClassroomMember, Announcement
+from assignment.models import Assignment, AssignmentSubmission
+from core.models import FeedEntry
+
+# Any id works: SQLite plans depend on the shape of the query, not the values
+SAMPLE_ID = 1
+
+# Full table scans and sorts that could not use an index, per vendor
+FULL_SCAN = {
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)$'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+TEMP_SORT = {
+    'sqlite': 'USE TEMP B-TREE',
+    'postgresql': 'Sort Key:',
+}
+
+# Hot queries that are known to sort in memory over a small, already
+# filtered set of rows. A temp sort anywhere else is a regression.
+EXPECTED_TEMP_SORTS = {
+    'assignment_list (teachers)',
+    'assignment_list submission status',
+    'classroom_detail pinned announcements',
+}
+
+
+def hot_queries():
+    """
+    The query shapes behind the busiest pages, keyed by a short description.
+    Keep this in sync with core/views.py, classroom/views.py and assignment/views.py.
+    """
+    return {
+        'assignment_list (students)': Assignment.objects.filter(
+            classroom_id=SAMPLE_ID, is_published=True, is_draft=False
+        ).order_by('-created_at'),
+        'assignment_list (teachers)': Assignment.objects.filter(
+            classroom_id=SAMPLE_ID
+        ).with_submission_counts().order_by('-created_at'),
+        'assignment_list submission status': AssignmentSubmission.objects.filter(
+            assignment__classroom_id=SAMPLE_ID, student_id=SAMPLE_ID
+        ),
+        'submission_list': AssignmentSubmission.objects.filter(
+            assignment_id=SAMPLE_ID
+        ).order_by('-submitted_at'),
+        'dashboard activity feed': FeedEntry.objects.filter(
+            user_id=SAMPLE_ID
+        ).select_related('event', 'event__actor').order_by('-created_at', '-pk')[:11],
+        'dashboard created assignments': Assignment.objects.filter(created_by_id=SAMPLE_ID),
+        'dashboard recent memberships': ClassroomMember.objects.filter(
+            user_id=SAMPLE_ID, is_active=True
+        ).order_by('-joined_at')[:5],
+        'dashboard created classrooms': Classroom.objects.filter(
+            creator_id=SAMPLE_ID
+        ).order_by('-created_at')[:5],
+        'classroom_list (admins)': Classroom.objects.filter(
+            is_active=True
+        ).order_by('-created_at', '-pk')[:31],
+        'classroom_list (members)': Classroom.objects.filter(is_active=True).annotate(
+            user_membership=FilteredRelation('members', condition=Q(members__user_id=SAMPLE_ID)),
+        ).annotate(user_role=F('user_membership__role')).filter(
+            Q(creator_id=SAMPLE_ID) | Q(user_membership__is_active=True)
+        ).order_by('-created_at', '-pk')[:31],
+        'classroom_detail members': ClassroomMember.objects.filter(
+            classroom_id=SAMPLE_ID, is_active=True
+        ).select_related('user'),
+        'classroom_detail pinned announcements': Announcement.objects.filter(
+            classroom_id=SAMPLE_ID, is_pinned=True
+        ).order_by('-created_at', '-pk'),
+        'classroom_detail announcement stream': Announcement.objects.filter(
+            classroom_id=SAMPLE_ID, is_pinned=False
+        ).order_by('-created_at', '-pk')[:11],
+        'admin_users by role': User.objects.filter(
+            role=User.Role.STUDENT
+        ).order_by('-date_joined', '-pk')[:51],
+        'admin_submissions': AssignmentSubmission.objects.order_by('-submitted_at', '-pk')[:51],
+        'admin_submissions pending': AssignmentSubmission.objects.filter(
+            is_graded=False
+        ).order_by('-submitted_at', '-pk')[:51],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN on the hot query shapes and exit non-zero if any '
+        'falls back to a full table scan or to an unexpected temp sort'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Print the full plan for every query',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN:
+            self.stdout.write(self.style.WARNING(
+                f'Query plan checks target SQLite and PostgreSQL; skipping on {vendor}.'
+            ))
+            return
+
+        failures = []
+        for name, queryset in hot_queries().items():
+            plan = self.explain(queryset)
+            scans = [
+                match.group(1)
+                for line in plan.splitlines()
+                if (match := FULL_SCAN[vendor].search(line.strip()))
+            ]
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}: {", ".join(scans)}'))
+            elif TEMP_SORT[vendor] in plan and name not in EXPECTED_TEMP_SORTS:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'TEMP SORT  {name}'))
+            elif TEMP_SORT[vendor] in plan:
+                self.stdout.write(self.style.WARNING(f'TEMP SORT  {name} (expected)'))
+            else:
+                self.stdout.write(f'ok         {name}')
+            if options['verbose_plans'] or name in failures:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        # CommandError makes manage.py exit with status 1, failing a CI step
+        if failures:
+            raise CommandError(f'{len(failures)} hot query plan(s) regressed: {", ".join(failures)}.')
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
+
+    def explain(self, queryset):
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+        # PostgreSQL prefers sequential scans on small tables; discourage them
+        # so that a remaining Seq Scan means no index can serve the query
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.activity import rebuild_activity_feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild the activity events and per-user feeds from existing classroom data"
+
+    def handle(self, *args, **options):
+        written = rebuild_activity_feed()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} activity events.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.search import rebuild_search_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (SQLite FTS5)"
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            self.stdout.write(self.style.WARNING('Full-text indexing needs SQLite; search uses icontains on this database.'))
+            return
+        written = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} objects.'))
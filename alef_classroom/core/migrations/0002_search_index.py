@@ -0,0 +1,38 @@
+from django.db import migrations
+
+CREATE_SEARCH_INDEX = """
+CREATE VIRTUAL TABLE search_index USING fts5(
+    title,
+    body,
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    classroom_id UNINDEXED,
+    audience UNINDEXED,
+    owner_id UNINDEXED,
+    label UNINDEXED,
+    url UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other databases use core.search's fallback
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(CREATE_SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_activity_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ActivityEvent(models.Model):
+    """
+    Something that happened in a classroom, recorded once when it happens.
+    Users see events through their FeedEntry rows.
+    """
+    class Verb(models.TextChoices):
+        SUBMISSION = 'submission', 'Submission'
+        GRADE = 'grade', 'Grade'
+        ASSIGNMENT = 'assignment', 'Assignment'
+        ANNOUNCEMENT = 'announcement', 'Announcement'
+
+    verb = models.CharField(max_length=20, choices=Verb.choices)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activity_events'
+    )
+    classroom = models.ForeignKey(
+        'classroom.Classroom',
+        on_delete=models.CASCADE,
+        related_name='activity_events'
+    )
+    assignment = models.ForeignKey(
+        'assignment.Assignment',
+        on_delete=models.CASCADE,
+        related_name='activity_events',
+        null=True,
+        blank=True
+    )
+    title = models.CharField(max_length=255)
+    description = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class FeedEntry(models.Model):
+    """
+    One event in one user's activity feed, written when the event is
+    recorded so that reading a feed is a single range scan on (user, created_at).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    event = models.ForeignKey(
+        ActivityEvent,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    # Copy of event.created_at so the feed can be ordered without a join
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.event} for {self.user}"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'feed entries'
+        unique_together = ['user', 'event']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='feed_user_created_idx'),
+        ]
@@ -0,0 +1,149 @@
+"""
+Keyset (cursor) pagination for large, append-mostly tables.
+
+Unlike OFFSET pagination, each page is fetched with a WHERE clause on the
+sort key of the last row seen, so the cost of a page does not grow with its
+depth and rows inserted while a user is paging do not shift later pages.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder that keeps full microsecond precision for datetimes, which
+    DjangoJSONEncoder truncates to milliseconds. A truncated sort key would
+    make the next page skip rows.
+    """
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage:
+    """
+    A single page of results along with the cursor for the following page.
+    """
+    def __init__(self, items, next_cursor=None, cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _split_ordering(ordering):
+    return [(name[1:], True) if name.startswith('-') else (name, False) for name in ordering]
+
+
+def _resolve_field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def encode_cursor(values):
+    """Encode a list of sort key values as an opaque, URL-safe cursor."""
+    payload = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Decode a cursor produced by encode_cursor() back into Python values for
+    the ordering fields. Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    fields = _split_ordering(ordering)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Invalid cursor: wrong number of values")
+    try:
+        values = [_resolve_field(model, name).to_python(value) for (name, _), value in zip(fields, values)]
+    except (ValidationError, TypeError, ValueError) as e:
+        # to_python() raises TypeError or ValueError, not only ValidationError,
+        # for JSON values of the wrong type (a list or object for a datetime)
+        raise ValueError(f"Invalid cursor: {e}")
+    # to_python() passes null through, but sort fields are never null and
+    # filter() refuses None
+    if any(value is None for value in values):
+        raise ValueError("Invalid cursor: null value")
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the Q object selecting rows that sort strictly after the given
+    sort key values, e.g. for ('-created_at', '-pk'):
+    created_at < v0 OR (created_at = v0 AND pk < v1).
+    """
+    fields = _split_ordering(ordering)
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        term = Q(**{f'{name}__{"lt" if descending else "gt"}': values[index]})
+        for prior_index in range(index):
+            term &= Q(**{fields[prior_index][0]: values[prior_index]})
+        condition |= term
+    return condition
+
+
+def cursor_paginate(queryset, cursor=None, ordering=('-created_at', '-pk'), per_page=25):
+    """
+    Return a CursorPage of queryset ordered by ordering, starting after cursor.
+
+    The ordering must end in a unique field (normally pk) so that every row
+    has a distinct sort key. Fields must be non-nullable model fields.
+    Invalid cursors fall back to the first page.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            values = decode_cursor(cursor, queryset.model, ordering)
+        except ValueError:
+            cursor = None
+        else:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name, _ in _split_ordering(ordering)])
+    return CursorPage(items, next_cursor=next_cursor, cursor=cursor)
+
+
+def page_query(request, cursor):
+    """
+    Return the query string for another page of the current listing,
+    keeping every other GET parameter (filters) intact.
+    """
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    if cursor:
+        params['cursor'] = cursor
+    return params.urlencode()
@@ -0,0 +1,107 @@
+"""
+Bounded retries for writes that lose the race for the SQLite write lock.
+
+SQLite allows one writer at a time. busy_timeout makes a writer wait for
+the lock, but under sustained load a transaction can still give up with
+"database is locked". retry_on_locked runs a write view inside a
+transaction and retries the whole transaction a few times with jittered
+exponential backoff. The counters show how often that happens, so rising numbers
+warn that the database is close to saturation before users see errors.
+On PostgreSQL the same retries cover deadlocks and serialization failures.
+"""
+import functools
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+_lock = threading.Lock()
+_counters = {
+    'transactions': 0,   # transactions run through retry_on_locked
+    'lock_errors': 0,    # attempts that failed with a lock error
+    'retried_ok': 0,     # transactions that succeeded after one or more retries
+    'gave_up': 0,        # transactions that still failed after the last retry
+}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+# PostgreSQL serialization_failure and deadlock_detected: the transaction
+# was rolled back and can simply be run again
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+
+def is_lock_error(error):
+    cause = error.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def lock_contention_stats():
+    """Counters for this process since it started."""
+    with _lock:
+        stats = dict(_counters)
+    stats['contention_rate'] = (
+        round(stats['lock_errors'] / stats['transactions'], 4) if stats['transactions'] else 0.0
+    )
+    return stats
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _queued_messages(request):
+    # The list of flash messages added during this request, if the messages
+    # middleware is installed (see django.contrib.messages.storage.base)
+    return getattr(getattr(request, '_messages', None), '_queued_messages', None)
+
+
+def retry_on_locked(view=None, *, attempts=None, backoff=None):
+    """
+    Run a view's POST (and other unsafe) requests in a transaction, retrying
+    on lock errors up to attempts times in total. Safe methods run as usual.
+    Calls made inside an outer transaction are not retried, since the outer
+    transaction has already been rolled back by the failure. Flash messages
+    added by a failed attempt are discarded, so a retried view does not
+    show them twice.
+    """
+    if view is None:
+        return functools.partial(retry_on_locked, attempts=attempts, backoff=backoff)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS or connection.in_atomic_block:
+            return view(request, *args, **kwargs)
+        max_attempts = attempts or settings.DB_LOCK_RETRY_ATTEMPTS
+        delay = backoff or settings.DB_LOCK_RETRY_BACKOFF
+        _count('transactions')
+        for attempt in range(1, max_attempts + 1):
+            messages = _queued_messages(request)
+            queued = len(messages) if messages is not None else 0
+            try:
+                with transaction.atomic():
+                    result = view(request, *args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                _count('lock_errors')
+                if attempt == max_attempts:
+                    _count('gave_up')
+                    raise
+                messages = _queued_messages(request)
+                if messages is not None:
+                    del messages[queued:]
+                time.sleep(delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            else:
+                if attempt > 1:
+                    _count('retried_ok')
+                return result
+    return wrapper
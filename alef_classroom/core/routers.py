@@ -0,0 +1,137 @@
+"""
+Read/write splitting between the primary database and a read-only replica.
+
+Reads are sent to the 'replica' alias only inside views decorated with
+use_replica (or code run under reading_from_replica()), and only when that
+alias is configured; everything else, and every write, uses 'default'.
+A user who has just written keeps reading from 'default' for
+REPLICA_READ_YOUR_WRITES_SECONDS, so they always see their own changes even
+when the replica lags behind.
+
+CacheRouter sends the DatabaseCache table to the 'cache' alias, a separate
+SQLite file, when the shared cache is configured to use it.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = 'replica'
+CACHE_ALIAS = 'cache'
+# app_label of the model Django's DatabaseCache uses for its table
+CACHE_APP_LABEL = 'django_cache'
+RECENT_WRITE_COOKIE = 'recent_write'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_reading_from_replica = contextvars.ContextVar('reading_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_active():
+    """Whether reads made now are routed to the replica."""
+    return _reading_from_replica.get() and replica_configured()
+
+
+@contextmanager
+def reading_from_replica(enabled=True):
+    """Route the reads made inside the block to the replica (when configured)."""
+    token = _reading_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+def recently_wrote(request):
+    return RECENT_WRITE_COOKIE in request.COOKIES
+
+
+def use_replica(view):
+    """
+    Serve a read-only view from the replica, except for users who wrote
+    something within the read-your-writes window.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or recently_wrote(request):
+            return view(request, *args, **kwargs)
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica while reading_from_replica() is in effect.
+    Writes always go to the primary, even for objects loaded from the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_active():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class CacheRouter:
+    """
+    Keeps the DatabaseCache table in the separate 'cache' SQLite database
+    (when configured), so cache writes never contend for the main
+    database's write lock, and keeps everything else out of that database.
+    """
+
+    def _cache_alias(self, model):
+        if model._meta.app_label == CACHE_APP_LABEL and CACHE_ALIAS in settings.DATABASES:
+            return CACHE_ALIAS
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._cache_alias(model)
+
+    def db_for_write(self, model, **hints):
+        return self._cache_alias(model)
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == CACHE_ALIAS:
+            return app_label == CACHE_APP_LABEL
+        if app_label == CACHE_APP_LABEL and CACHE_ALIAS in settings.DATABASES:
+            return False
+        return None
+
+
+class RecentWriteMiddleware:
+    """
+    Marks users who just made a write request with a short-lived cookie so
+    that use_replica keeps their reads on the primary until the replica has
+    caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                RECENT_WRITE_COOKIE, '1',
+                max_age=settings.REPLICA_READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,409 @@
+"""
+Full-text search over classroom content.
+
+On SQLite, assignments, announcements, both kinds of comments and
+submissions are indexed in the search_index FTS5 table (created by core
+migration 0002). Each row records the classroom it belongs to and who may
+see it, so results are filtered by the searching user's classrooms inside
+the same query that ranks them. Receivers in core.signals keep the index
+in sync; code that bypasses model signals (bulk_create, queryset.update)
+must call index_objects() itself.
+
+Other databases have no FTS5, so search falls back to icontains queries
+with the same permission rules.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from assignment.models import Assignment, AssignmentSubmission, Comment as AssignmentComment
+from classroom.membership import TEACHING_ROLES
+from classroom.models import Announcement, Classroom, ClassroomMember, Comment as AnnouncementComment
+
+TABLE = 'search_index'
+RESULTS_PER_PAGE = 20
+MAX_QUERY_LENGTH = 200
+BATCH_SIZE = 1000
+
+# Who may see an indexed document, besides the classroom's teachers
+AUDIENCE_MEMBERS = 'members'   # every member of the classroom
+AUDIENCE_STAFF = 'staff'       # teachers only (unpublished assignments)
+AUDIENCE_OWNER = 'owner'       # the owning student (submissions and their comments)
+
+# Markers placed around matches by FTS5, swapped for <mark> after escaping
+MATCH_START, MATCH_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+
+@dataclass(frozen=True)
+class SearchKind:
+    """
+    How one model is indexed: its rowid code, the related rows its
+    document needs, and (for the fallback search) its text fields and the
+    lookups leading to its classroom.
+    """
+    name: str
+    code: int
+    model: type
+    select_related: tuple
+    text_fields: tuple
+    classroom_lookups: tuple
+
+    def rowid(self, pk):
+        # Unique across kinds, so a document is replaced or removed by rowid
+        return pk * 8 + self.code
+
+
+KINDS = {
+    kind.model: kind for kind in (
+        SearchKind('assignment', 1, Assignment, (),
+                   ('title', 'description', 'instructions'), ('classroom_id',)),
+        SearchKind('announcement', 2, Announcement, (),
+                   ('title', 'content'), ('classroom_id',)),
+        SearchKind('announcement_comment', 3, AnnouncementComment, ('announcement',),
+                   ('content',), ('announcement__classroom_id',)),
+        SearchKind('assignment_comment', 4, AssignmentComment, ('assignment', 'submission__assignment'),
+                   ('content',), ('assignment__classroom_id', 'submission__assignment__classroom_id')),
+        SearchKind('submission', 5, AssignmentSubmission, ('assignment', 'student'),
+                   ('content', 'feedback'), ('assignment__classroom_id',)),
+    )
+}
+KINDS_BY_NAME = {kind.name: kind for kind in KINDS.values()}
+
+
+def display_name(user):
+    return user.get_full_name() or user.username
+
+
+def assignment_audience(assignment):
+    if assignment.is_published and not assignment.is_draft:
+        return AUDIENCE_MEMBERS
+    return AUDIENCE_STAFF
+
+
+def document(obj):
+    """
+    Return the indexed fields of obj: (title, body, classroom id,
+    audience, owner id, label, url), or None if it belongs to no classroom.
+    """
+    if isinstance(obj, Assignment):
+        body = '\n'.join(filter(None, [obj.description, obj.instructions]))
+        return (obj.title, body, obj.classroom_id, assignment_audience(obj), None,
+                obj.title, reverse('assignment:detail', args=[obj.pk]))
+    if isinstance(obj, Announcement):
+        return (obj.title, obj.content, obj.classroom_id, AUDIENCE_MEMBERS, None,
+                obj.title, reverse('classroom:detail', args=[obj.classroom_id]))
+    if isinstance(obj, AnnouncementComment):
+        announcement = obj.announcement
+        return ('', obj.content, announcement.classroom_id, AUDIENCE_MEMBERS, None,
+                f"Comment on {announcement.title}", reverse('classroom:detail', args=[announcement.classroom_id]))
+    if isinstance(obj, AssignmentComment):
+        if obj.submission_id:
+            assignment = obj.submission.assignment
+            return ('', obj.content, assignment.classroom_id, AUDIENCE_OWNER, obj.submission.student_id,
+                    f"Comment on a submission for {assignment.title}",
+                    reverse('assignment:submission_detail', args=[obj.submission_id]))
+        if obj.assignment_id:
+            assignment = obj.assignment
+            return ('', obj.content, assignment.classroom_id, assignment_audience(assignment), None,
+                    f"Comment on {assignment.title}", reverse('assignment:detail', args=[assignment.pk]))
+        return None
+    if isinstance(obj, AssignmentSubmission):
+        body = '\n'.join(filter(None, [obj.content, obj.feedback]))
+        return ('', body, obj.assignment.classroom_id, AUDIENCE_OWNER, obj.student_id,
+                f"Submission by {display_name(obj.student)} for {obj.assignment.title}",
+                reverse('assignment:submission_detail', args=[obj.pk]))
+    raise TypeError(f"{type(obj).__name__} is not searchable")
+
+
+def search_enabled():
+    """Whether the FTS5 index exists (SQLite only)."""
+    return connection.vendor == 'sqlite'
+
+
+def _delete_rows(cursor, rowids):
+    cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(rowid,) for rowid in rowids])
+
+
+def index_queryset(queryset):
+    """Add or replace the index entries of every object in queryset."""
+    if not search_enabled():
+        return
+    kind = KINDS[queryset.model]
+    _write(kind, queryset.select_related(*kind.select_related))
+
+
+def index_objects(objects):
+    """
+    Add or replace the index entries of objects of any searchable model.
+    Each model's rows are reloaded with the relations their documents need,
+    one query per model.
+    """
+    by_model = {}
+    for obj in objects:
+        by_model.setdefault(type(obj), set()).add(obj.pk)
+    for model, pks in by_model.items():
+        index_queryset(model.objects.filter(pk__in=pks))
+
+
+def _write(kind, objects):
+    rowids = []
+    rows = []
+    for obj in objects:
+        rowids.append(kind.rowid(obj.pk))
+        fields = document(obj)
+        if fields is not None:
+            title, body, *rest = fields
+            rows.append((kind.rowid(obj.pk), title, body, kind.name, obj.pk, *rest))
+    with connection.cursor() as cursor:
+        _delete_rows(cursor, rowids)
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, body, kind, object_id, classroom_id, audience, owner_id, label, url) '
+            f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def unindex_objects(objects):
+    """Remove the index entries of deleted objects."""
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        _delete_rows(cursor, [KINDS[type(obj)].rowid(obj.pk) for obj in objects])
+
+
+def rebuild_search_index():
+    """Empty the index and index every searchable object again. Returns the number indexed."""
+    if not search_enabled():
+        return 0
+    written = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+        for kind in KINDS.values():
+            batch = []
+            queryset = kind.model.objects.select_related(*kind.select_related).order_by('pk')
+            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) >= BATCH_SIZE:
+                    _write(kind, batch)
+                    written += len(batch)
+                    batch = []
+            _write(kind, batch)
+            written += len(batch)
+    # Merge the index segments written above
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return written
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (so results appear while typing). Returns None if the text
+    has no words. Quoting each word keeps FTS5 syntax out of user input.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+@dataclass
+class Visibility:
+    """The classrooms whose content a user may search, by what they may see there."""
+    all_classrooms: bool = False
+    teaching: frozenset = frozenset()
+    member: frozenset = frozenset()
+
+    @classmethod
+    def for_user(cls, user):
+        if user.is_admin:
+            return cls(all_classrooms=True)
+        roles = dict(ClassroomMember.objects.filter(
+            user=user, is_active=True, classroom__is_active=True
+        ).values_list('classroom_id', 'role'))
+        created = set(Classroom.objects.filter(creator=user, is_active=True).values_list('pk', flat=True))
+        teaching = created | {pk for pk, role in roles.items() if role in TEACHING_ROLES}
+        return cls(teaching=frozenset(teaching), member=frozenset(roles.keys() - teaching))
+
+    @property
+    def empty(self):
+        return not (self.all_classrooms or self.teaching or self.member)
+
+    def allows(self, classroom_id, audience, owner_id, user):
+        if self.all_classrooms or classroom_id in self.teaching:
+            return True
+        if classroom_id not in self.member:
+            return False
+        return audience == AUDIENCE_MEMBERS or (audience == AUDIENCE_OWNER and owner_id == user.pk)
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    object_id: int
+    label: str
+    url: str
+    title: str
+    snippet: str
+
+    @property
+    def kind_label(self):
+        return self.kind.replace('_', ' ').capitalize()
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'id': self.object_id,
+            'label': self.label,
+            'url': self.url,
+            'title': self.title,
+            'snippet': self.snippet,
+        }
+
+
+def _marked(text):
+    """Escape FTS5 output and turn its match markers into <mark> tags."""
+    text = escape(text).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+    return mark_safe(text)
+
+
+def search(user, query, kinds=None, limit=RESULTS_PER_PAGE):
+    """
+    Return up to limit SearchResults for query that user may see, best
+    match first, with the matched words wrapped in <mark> in each result's
+    title and snippet. kinds optionally restricts the result kinds by name.
+    """
+    visibility = Visibility.for_user(user)
+    if visibility.empty or not query.strip():
+        return []
+    kinds = [KINDS_BY_NAME[name] for name in kinds] if kinds else list(KINDS.values())
+    if search_enabled():
+        return _fts_search(user, query, kinds, visibility, limit)
+    return _fallback_search(user, query, kinds, visibility, limit)
+
+
+def _fts_search(user, query, kinds, visibility, limit):
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    conditions = [f'{TABLE} MATCH %s']
+    params = [expression]
+    if len(kinds) < len(KINDS):
+        conditions.append(f"kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kind.name for kind in kinds)
+    if not visibility.all_classrooms:
+        teaching = ', '.join(str(pk) for pk in visibility.teaching) or 'NULL'
+        member = ', '.join(str(pk) for pk in visibility.member) or 'NULL'
+        conditions.append(
+            f"(classroom_id IN ({teaching}) OR (classroom_id IN ({member}) AND "
+            f"(audience = %s OR (audience = %s AND owner_id = %s))))"
+        )
+        params.extend([AUDIENCE_MEMBERS, AUDIENCE_OWNER, user.pk])
+    sql = (
+        f"SELECT kind, object_id, label, url, "
+        f"highlight({TABLE}, 0, %s, %s), snippet({TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}) "
+        f"FROM {TABLE} WHERE {' AND '.join(conditions)} "
+        # Title matches count five times as much as body matches
+        f"ORDER BY bm25({TABLE}, 5.0, 1.0) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [MATCH_START, MATCH_END, MATCH_START, MATCH_END, *params, limit])
+        rows = cursor.fetchall()
+    return [
+        SearchResult(kind, object_id, label, url, _marked(title), _marked(snippet))
+        for kind, object_id, label, url, title, snippet in rows
+    ]
+
+
+def _fallback_search(user, query, kinds, visibility, limit):
+    words = re.findall(r'\w+', query)
+    if not words:
+        return []
+    pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+    results = []
+    for kind in kinds:
+        queryset = kind.model.objects.select_related(*kind.select_related)
+        for word in words:
+            matches = Q()
+            for field in kind.text_fields:
+                matches |= Q(**{f'{field}__icontains': word})
+            queryset = queryset.filter(matches)
+        if not visibility.all_classrooms:
+            classroom_ids = visibility.teaching | visibility.member
+            in_classrooms = Q()
+            for lookup in kind.classroom_lookups:
+                in_classrooms |= Q(**{f'{lookup}__in': classroom_ids})
+            queryset = queryset.filter(in_classrooms)
+        for obj in queryset.order_by('-pk')[:limit * 2]:
+            fields = document(obj)
+            if fields is None:
+                continue
+            title, body, classroom_id, audience, owner_id, label, url = fields
+            if not visibility.allows(classroom_id, audience, owner_id, user):
+                continue
+            results.append((
+                0 if pattern.search(title) else 1,
+                SearchResult(kind.name, obj.pk, label, url,
+                             _highlight(title, pattern), _highlight(_excerpt(body, pattern), pattern)),
+            ))
+    results.sort(key=lambda result: result[0])
+    return [result for _, result in results[:limit]]
+
+
+def _excerpt(text, pattern, width=160):
+    match = pattern.search(text)
+    start = max(0, match.start() - width // 2) if match else 0
+    excerpt = text[start:start + width]
+    return ('…' if start else '') + excerpt + ('…' if start + width < len(text) else '')
+
+
+def _highlight(text, pattern):
+    return _marked(pattern.sub(lambda match: f'{MATCH_START}{match.group(0)}{MATCH_END}', text))
+
+
+def matching_ids(model, query):
+    """Primary keys of model's objects matching query (no permission filtering)."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s',
+            [expression, KINDS[model].name],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class FullTextSearchAdminMixin:
+    """
+    ModelAdmin mixin that answers the changelist search box from the
+    full-text index instead of icontains scans over the text columns.
+    The admin's own search_fields (keep them to cheap lookups such as
+    exact usernames) are still applied and their matches added. Without
+    the index, fulltext_fallback_fields are searched the usual way.
+    """
+    fulltext_fallback_fields = ()
+
+    def get_search_fields(self, request):
+        fields = tuple(super().get_search_fields(request))
+        if not search_enabled():
+            fields += tuple(self.fulltext_fallback_fields)
+        return fields
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search_enabled():
+            return super().get_search_results(request, queryset, search_term)
+        ids = matching_ids(queryset.model, search_term)
+        if not self.get_search_fields(request):
+            return queryset.filter(pk__in=ids), False
+        by_fields, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=ids) | by_fields, may_have_duplicates
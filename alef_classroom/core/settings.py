@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -96,6 +97,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.routers.RecentWriteMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -122,14 +124,106 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# Use SQLite for all environments
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# SQLite by default; set DB_ENGINE=postgresql to use PostgreSQL
+# SQLite tuned for concurrent workers: WAL and the pragmas in
+# core.db_backends.sqlite3, and atomic blocks that take the write lock up front
+SQLITE_OPTIONS = {
+    'pragmas': {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    },
+    'transaction_mode': 'IMMEDIATE',
 }
 
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').lower()
+
+
+def postgres_database(host, port):
+    """
+    PostgreSQL connection settings (requires psycopg). Connections are kept
+    open for DB_CONN_MAX_AGE seconds and checked before reuse. Behind
+    pgbouncer in transaction pooling mode (DB_PGBOUNCER=1) server-side
+    cursors are disabled, since a cursor cannot outlive the transaction
+    that pgbouncer hands to the next client.
+    """
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'alef_classroom'),
+        'USER': os.environ.get('POSTGRES_USER', 'alef_classroom'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': host,
+        'PORT': port,
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', '0') == '1',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', 5)),
+        },
+        'TEST': {
+            'NAME': os.environ.get('POSTGRES_TEST_DB', 'test_alef_classroom'),
+        },
+    }
+
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': postgres_database(
+            os.environ.get('POSTGRES_HOST', 'localhost'),
+            os.environ.get('POSTGRES_PORT', '5432'),
+        ),
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}.")
+
+# Optional read-only replica for the reporting views (see core.routers):
+# a PostgreSQL standby at DB_REPLICA_HOST, or for SQLite a copy of the
+# database file (e.g. kept by Litestream or rsync) at DB_REPLICA_PATH
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DB_REPLICA_PATH = os.environ.get('DB_REPLICA_PATH')
+if DB_ENGINE == 'postgresql' and DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **postgres_database(DB_REPLICA_HOST, os.environ.get('DB_REPLICA_PORT', '5432')),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DB_ENGINE == 'sqlite' and DB_REPLICA_PATH:
+    DATABASES['replica'] = {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': f'file:{DB_REPLICA_PATH}?mode=ro',
+        'OPTIONS': {
+            'pragmas': {'journal_mode': None, 'query_only': 'ON'},
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.CacheRouter', 'core.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write something
+REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+
+# Write views retry transactions that fail with "database is locked"
+DB_LOCK_RETRY_ATTEMPTS = int(os.environ.get('DB_LOCK_RETRY_ATTEMPTS', 3))
+DB_LOCK_RETRY_BACKOFF = float(os.environ.get('DB_LOCK_RETRY_BACKOFF', 0.05))
+
+# 'direct' creates submissions in the request; 'queued' records them for the
+# ingest_submissions writer to commit in batches (see assignment.ingestion)
+SUBMISSION_INGESTION_MODE = os.environ.get('SUBMISSION_INGESTION_MODE', 'direct')
+if SUBMISSION_INGESTION_MODE not in ('direct', 'queued'):
+    raise ImproperlyConfigured("SUBMISSION_INGESTION_MODE must be 'direct' or 'queued'.")
+
+# Shared secret a student information system sends as "Authorization:
+# Bearer <token>" to POST /classroom/roster-sync/; empty disables the endpoint
+ROSTER_SYNC_TOKEN = os.environ.get('ROSTER_SYNC_TOKEN', '')
+
+# The grading grid posts two fields per submission; allow large classes
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 5000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -200,6 +294,67 @@ REST_FRAMEWORK = {
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Cache: a small per-process L1 in front of an L2 shared by every worker
+# process, so that version bumps (core.versions) reach all of them. The L2 is
+# Redis when REDIS_URL is set, a file-based cache when CACHE_DIR is set, and
+# otherwise a database cache in its own SQLite file (CACHE_DB_PATH), whose
+# writes never wait for the main database's lock. Only development
+# (DEBUG) falls back to in-process memory, which is not shared.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_DIR = os.environ.get('CACHE_DIR', '')
+SQLITE_CACHE_DATABASE = {
+    'ENGINE': 'core.db_backends.sqlite3',
+    'NAME': os.environ.get('CACHE_DB_PATH', BASE_DIR / 'cache.sqlite3'),
+    'OPTIONS': SQLITE_OPTIONS,
+}
+SQLITE_SHARED_CACHE = {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'cache_table',
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+}
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+elif CACHE_DIR:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+elif DEBUG:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+else:
+    # Create the table with: python manage.py createcachetable
+    SHARED_CACHE = SQLITE_SHARED_CACHE
+    DATABASES['cache'] = SQLITE_CACHE_DATABASE
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+# Lifetime in seconds of the cached admin dashboard statistics snapshot
+ADMIN_STATISTICS_TTL = int(os.environ.get('ADMIN_STATISTICS_TTL', 60))
+
+# Lifetime in seconds of the user and classroom data versions behind
+# cached dashboards and ETags
+DASHBOARD_VERSION_TTL = int(os.environ.get('DASHBOARD_VERSION_TTL', 24 * 60 * 60))
+
+# Lifetime in seconds of a cached dashboard and its rendered fragments
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60 * 60))
+
 # Authentication settings
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
@@ -6,6 +6,7 @@ Inherits from base settings but with production-specific overrides.
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,13 +45,8 @@ if allowed_hosts_env:
 else:
     ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
-# Database - Use SQLite for all environments
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database - SQLite or PostgreSQL (DB_ENGINE) and the optional read replica from
+# base settings (DATABASES, DATABASE_ROUTERS)
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
@@ -76,16 +72,47 @@ SECURE_HSTS_PRELOAD = True
 # SESSION_COOKIE_SECURE = True
 # CSRF_COOKIE_SECURE = True
 
-# Cache configuration - use database cache
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-        'LOCATION': 'cache_table',
-    }
+# Cache configuration - the tiered cache from base settings. The base
+# settings chose the L2 before DEBUG was turned off above, so never keep
+# their per-process development fallback: without REDIS_URL or CACHE_DIR
+# the L2 is the database cache in its own SQLite file (run
+# python manage.py createcachetable once)
+if SHARED_CACHE['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    SHARED_CACHE = CACHES['shared'] = SQLITE_SHARED_CACHE
+    DATABASES['cache'] = SQLITE_CACHE_DATABASE
+
+# Session configuration. SESSION_BACKEND selects the store:
+# - cached_db (default): sessions are read from the shared cache and only
+#   fall back to the database on a miss; writes go to both. Existing
+#   database sessions stay valid, so switching from db is seamless.
+# - signed_cookies: no server-side storage at all; the session lives in a
+#   signed cookie. Switching to it logs out everyone with a database session.
+# - db: the previous behaviour, every session read is a database query.
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
 }
-
-# Session configuration - use database sessions
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db')
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"SESSION_BACKEND must be one of {', '.join(map(repr, SESSION_ENGINES))}, not {SESSION_BACKEND!r}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+# Sessions go straight to the L2, bypassing each worker's L1. cached_db is
+# only correct when that L2 is shared by every worker: with a per-process
+# cache, a logout on one worker would leave the session cached, and still
+# logged in, on all the others
+SESSION_CACHE_ALIAS = 'shared'
+if SESSION_BACKEND == 'cached_db' and CACHES['shared']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        "SESSION_BACKEND 'cached_db' needs a cache shared by all worker processes; "
+        "configure REDIS_URL, CACHE_DIR or the SQLite cache, or use 'db' or 'signed_cookies'."
+    )
+
+# Keep flash messages in their own cookie so that showing one never writes
+# the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 # Logging configuration
 LOGGING = {
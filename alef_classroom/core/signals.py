@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from classroom.models import Announcement, Classroom, ClassroomMember, Comment as AnnouncementComment
+from assignment.models import Assignment, AssignmentSubmission, Comment as AssignmentComment
+from . import search
+from .versions import bump_user_versions, bump_classroom_versions
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_version_on_user_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """A role or name change alters the user's own dashboard; logging in does not."""
+    if not raw and update_fields != frozenset(['last_login']):
+        bump_user_versions([instance.pk])
+
+@receiver(post_save, sender=Classroom)
+@receiver(post_delete, sender=Classroom)
+def bump_versions_on_classroom_change(sender, instance, raw=False, **kwargs):
+    """Classroom details appear on the dashboards of its creator and members."""
+    if not raw:
+        bump_classroom_versions([instance.pk])
+        bump_user_versions([instance.creator_id])
+
+@receiver(post_save, sender=ClassroomMember)
+@receiver(post_delete, sender=ClassroomMember)
+def bump_versions_on_member_change(sender, instance, raw=False, **kwargs):
+    """
+    Joining or leaving changes the member's classes and the classroom's
+    student count.
+    """
+    if not raw:
+        classroom_ids = {instance.classroom_id}
+        loaded_classroom_id = getattr(instance, '_loaded_classroom_id', None)
+        if loaded_classroom_id is not None:
+            classroom_ids.add(loaded_classroom_id)
+        bump_classroom_versions(classroom_ids)
+        bump_user_versions([instance.user_id])
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def bump_versions_on_assignment_change(sender, instance, raw=False, **kwargs):
+    """Assignments count for their creator and are pending for the classroom's students."""
+    if not raw:
+        bump_classroom_versions([instance.classroom_id])
+        bump_user_versions([instance.created_by_id])
+
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+def bump_version_on_submission_change(sender, instance, raw=False, **kwargs):
+    """Submitting changes the student's pending count."""
+    if not raw:
+        bump_user_versions([instance.student_id])
+
+@receiver(post_save, sender=Assignment)
+def index_assignment(sender, instance, created, raw=False, **kwargs):
+    """
+    Index the assignment. Its comments and submissions show its title and
+    follow its visibility, so an edit re-indexes them as well.
+    """
+    if raw:
+        return
+    search.index_objects([instance])
+    if not created:
+        search.index_queryset(AssignmentComment.objects.filter(
+            Q(assignment=instance) | Q(submission__assignment=instance)
+        ))
+        search.index_queryset(instance.submissions.all())
+
+@receiver(post_save, sender=Announcement)
+def index_announcement(sender, instance, created, raw=False, **kwargs):
+    """Index the announcement, and on edits its comments (which show its title)."""
+    if raw:
+        return
+    search.index_objects([instance])
+    if not created:
+        search.index_queryset(instance.comments.all())
+
+@receiver(post_save, sender=AnnouncementComment)
+@receiver(post_save, sender=AssignmentComment)
+@receiver(post_save, sender=AssignmentSubmission)
+def index_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_objects([instance])
+
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=AnnouncementComment)
+@receiver(post_delete, sender=AssignmentComment)
+@receiver(post_delete, sender=AssignmentSubmission)
+def unindex_text(sender, instance, **kwargs):
+    search.unindex_objects([instance])
@@ -0,0 +1,57 @@
+"""
+Site-wide statistics for the admin panel.
+
+All counts are computed with conditional aggregation, one query per table,
+and kept as a cached snapshot so that repeated dashboard loads do not scan
+the largest tables.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import User
+from classroom.models import Classroom
+from assignment.models import Assignment, AssignmentSubmission
+
+SITE_STATISTICS_CACHE_KEY = 'admin:site_statistics'
+
+
+def compute_site_statistics():
+    """
+    Compute every admin dashboard count directly from the database.
+    """
+    stats = User.objects.aggregate(
+        total_users=Count('pk'),
+        total_teachers=Count('pk', filter=Q(role=User.Role.TEACHER)),
+        total_students=Count('pk', filter=Q(role=User.Role.STUDENT)),
+        total_admins=Count('pk', filter=Q(role=User.Role.ADMIN)),
+    )
+    stats.update(Classroom.objects.aggregate(
+        total_classrooms=Count('pk'),
+        active_classrooms=Count('pk', filter=Q(is_active=True)),
+        archived_classrooms=Count('pk', filter=Q(is_archived=True)),
+    ))
+    stats.update(Assignment.objects.aggregate(
+        total_assignments=Count('pk'),
+    ))
+    stats.update(AssignmentSubmission.objects.aggregate(
+        total_submissions=Count('pk'),
+        graded_submissions=Count('pk', filter=Q(is_graded=True)),
+        pending_submissions=Count('pk', filter=Q(is_graded=False)),
+    ))
+    stats['computed_at'] = timezone.now()
+    return stats
+
+
+def get_site_statistics(refresh=False):
+    """
+    Return the cached statistics snapshot, recomputing it when it has
+    expired or when refresh is requested.
+    """
+    stats = None if refresh else cache.get(SITE_STATISTICS_CACHE_KEY)
+    if stats is None:
+        stats = compute_site_statistics()
+        cache.set(SITE_STATISTICS_CACHE_KEY, stats, settings.ADMIN_STATISTICS_TTL)
+    return stats
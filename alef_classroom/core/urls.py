@@ -21,13 +21,14 @@ from django.conf.urls.static import static
 from django.views.generic import TemplateView
 from django.views.static import serve
 from .views import (
-    HomeView, dashboard_view, 
+    HomeView, dashboard_view, dashboard_stats,
     dashboard_classroom_stats, dashboard_enrolled_stats,
     dashboard_assignment_stats, dashboard_pending_stats,
-    dashboard_recent_classes, dashboard_recent_activity
+    dashboard_recent_classes, dashboard_recent_activity, search_view
 )
 from .admin_views import (
-    admin_dashboard, admin_users, admin_classrooms, admin_submissions
+    admin_dashboard, admin_users, admin_classrooms, admin_submissions,
+    admin_import_roster,
 )
 from .health import health_check
 
@@ -37,6 +38,7 @@ urlpatterns = [
     path('dashboard/', dashboard_view, name='dashboard'),
     
     # HTMX Dashboard endpoints
+    path('dashboard/stats/', dashboard_stats, name='dashboard_stats'),
     path('dashboard/stats/classrooms/', dashboard_classroom_stats, name='dashboard_classroom_stats'),
     path('dashboard/stats/enrolled/', dashboard_enrolled_stats, name='dashboard_enrolled_stats'),
     path('dashboard/stats/assignments/', dashboard_assignment_stats, name='dashboard_assignment_stats'),
@@ -44,11 +46,15 @@ urlpatterns = [
     path('dashboard/recent-classes/', dashboard_recent_classes, name='dashboard_recent_classes'),
     path('dashboard/recent-activity/', dashboard_recent_activity, name='dashboard_recent_activity'),
     
+    # Full-text search (?format=json for the API)
+    path('search/', search_view, name='search'),
+    
     # Admin supervision URLs
     path('admin-panel/', admin_dashboard, name='admin_dashboard'),
     path('admin-panel/users/', admin_users, name='admin_users'),
     path('admin-panel/classrooms/', admin_classrooms, name='admin_classrooms'),
     path('admin-panel/submissions/', admin_submissions, name='admin_submissions'),
+    path('admin-panel/import-roster/', admin_import_roster, name='admin_import_roster'),
     
     # Health check
     path('health/', health_check, name='health_check'),
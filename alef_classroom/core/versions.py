@@ -0,0 +1,84 @@
+"""
+Data versions for cache invalidation and conditional GETs.
+
+Users and classrooms each have a version number in the cache that is bumped
+(by signal handlers in core.signals and by bulk code paths) whenever
+something derived from them may have changed. Cached dashboards remember the
+versions they were built from and are stale as soon as any of them moves,
+and views derive ETag and Last-Modified from them, so unchanged data is
+served without running queries. Versions only work across processes when
+CACHES points at a shared backend; a missing version is treated as a fresh
+change.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+USER_VERSION_KEY = 'version:user:{}'
+CLASSROOM_VERSION_KEY = 'version:classroom:{}'
+
+
+def _new_version():
+    # Nanoseconds since the epoch: unique enough per key and doubles as the
+    # modification time
+    return time.time_ns()
+
+
+def _get_versions(key_format, ids):
+    keys = {key_format.format(pk): pk for pk in ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, pk in keys.items():
+        if key not in found:
+            version = _new_version()
+            # add() so a concurrent bump is not overwritten by an older value
+            if not cache.add(key, version, settings.DASHBOARD_VERSION_TTL):
+                version = cache.get(key, version)
+            versions[pk] = version
+    return versions
+
+
+def _set_newer(keys):
+    # Only versions that exist need moving: a missing one already reads as a
+    # fresh change, and bulk paths (roster imports and syncs) would otherwise
+    # write a key for every user they touch
+    present = cache.get_many(keys)
+    if present:
+        cache.set_many(dict.fromkeys(present, _new_version()), settings.DASHBOARD_VERSION_TTL)
+
+
+def _bump(key_format, ids):
+    """
+    Inside a transaction the bump happens on commit, so a concurrent reader
+    cannot tag the old data with the new version.
+    """
+    keys = {key_format.format(pk) for pk in ids}
+    if keys:
+        transaction.on_commit(lambda: _set_newer(keys))
+
+
+def get_user_version(user_id):
+    """Return the user's current data version, starting one if none is cached."""
+    return _get_versions(USER_VERSION_KEY, [user_id])[user_id]
+
+
+def get_classroom_versions(classroom_ids):
+    """Return {classroom id: version} for the given classrooms."""
+    return _get_versions(CLASSROOM_VERSION_KEY, classroom_ids)
+
+
+def bump_user_versions(user_ids):
+    """Mark the data of every given user as changed."""
+    _bump(USER_VERSION_KEY, user_ids)
+
+
+def bump_classroom_versions(classroom_ids):
+    """Mark everything derived from the given classrooms as changed."""
+    _bump(CLASSROOM_VERSION_KEY, classroom_ids)
+
+
+def version_timestamp(version):
+    return datetime.datetime.fromtimestamp(version / 1e9, tz=datetime.timezone.utc)
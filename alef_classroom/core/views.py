@@ -1,10 +1,16 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView
-from django.db.models import Count
 from classroom.models import Classroom, ClassroomMember
-from assignment.models import Assignment, AssignmentSubmission
+from assignment.models import Assignment, PendingAssignment
+from .activity import feed_page
+from .dashboard import ACTIVITY_PER_PAGE, get_request_dashboard
+from .routers import use_replica
+from .search import KINDS_BY_NAME, MAX_QUERY_LENGTH, search
 
 class HomeView(TemplateView):
     """View for the landing/home page of the application."""
@@ -13,103 +19,65 @@ class HomeView(TemplateView):
 @login_required
 def dashboard_view(request):
     """View for the user's dashboard with context data."""
-    user = request.user
-    
-    # Get classroom statistics
-    if user.is_teacher or user.is_admin:
-        # Teachers and admins see classes they created
-        classroom_count = Classroom.objects.filter(creator=user).count()
-        assignment_count = Assignment.objects.filter(created_by=user).count()
-    else:
-        classroom_count = ClassroomMember.objects.filter(user=user).count()
-        # Count pending assignments for students
-        classrooms = ClassroomMember.objects.filter(user=user).values_list('classroom', flat=True)
-        assignments = Assignment.objects.filter(classroom__in=classrooms, is_published=True)
-        submissions = AssignmentSubmission.objects.filter(student=user).values_list('assignment', flat=True)
-        assignment_count = assignments.exclude(id__in=submissions).count()
-    
-    # Get recent classrooms
-    if user.is_teacher or user.is_admin:
-        recent_classrooms = Classroom.objects.filter(creator=user).order_by('-created_at')[:5]
-    else:
-        memberships = ClassroomMember.objects.filter(user=user).select_related('classroom').order_by('-joined_at')[:5]
-        recent_classrooms = [membership.classroom for membership in memberships]
-    
-    # Get recent activity
-    activities = []
-    if user.is_teacher or user.is_admin:
-        # Recent submissions for teacher's assignments
-        recent_submissions = AssignmentSubmission.objects.filter(
-            assignment__created_by=user
-        ).select_related('student', 'assignment').order_by('-submitted_at')[:10]
-        
-        for submission in recent_submissions:
-            student_name = submission.student.get_full_name() or submission.student.username
-            if submission.is_graded:
-                description = f"{student_name} received {submission.points_earned}/{submission.assignment.points_possible} on {submission.assignment.title}"
-                timestamp = submission.graded_at
-            else:
-                description = f"{student_name} submitted {submission.assignment.title} {'(late)' if submission.is_late else ''}"
-                timestamp = submission.submitted_at
-            
-            activities.append({
-                'type': 'submission',
-                'title': f"{'Graded' if submission.is_graded else 'Submitted'}: {submission.assignment.title}",
-                'user': student_name,
-                'timestamp': timestamp,
-                'description': description
-            })
-    else:
-        # Recent assignments and grades for students
-        classrooms = ClassroomMember.objects.filter(user=user).values_list('classroom', flat=True)
-        
-        # Get recent assignments
-        recent_assignments = Assignment.objects.filter(
-            classroom__in=classrooms,
-            is_published=True
-        ).order_by('-created_at')[:5]
-        
-        for assignment in recent_assignments:
-            teacher_name = assignment.created_by.get_full_name() or assignment.created_by.username
-            activities.append({
-                'type': 'assignment',
-                'title': f"New assignment: {assignment.title}",
-                'user': teacher_name,
-                'timestamp': assignment.created_at,
-                'description': f"New assignment in {assignment.classroom.name}"
-            })
-        
-        # Get recent grades
-        recent_grades = AssignmentSubmission.objects.filter(
-            student=user,
-            is_graded=True
-        ).select_related('assignment').order_by('-graded_at')[:5]
-        
-        for submission in recent_grades:
-            teacher_name = submission.assignment.created_by.get_full_name() or submission.assignment.created_by.username
-            activities.append({
-                'type': 'grade',
-                'title': f"Graded: {submission.assignment.title}",
-                'user': teacher_name,
-                'timestamp': submission.graded_at,
-                'description': f"You received {submission.points_earned}/{submission.assignment.points_possible} on {submission.assignment.title}"
-            })
-    
-    # Sort all activities by timestamp
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    activities = activities[:10]  # Limit to 10 items
+    dashboard = get_request_dashboard(request)
+    return render(request, 'base/dashboard.html', dashboard.template_context())
+
+def _dashboard_stats_format(request):
+    return 'json' if request.GET.get('format') == 'json' else 'html'
+
+def _dashboard_stats_etag(request):
+    dashboard = get_request_dashboard(request)
+    return f'"dashboard-{_dashboard_stats_format(request)}-{request.user.pk}-{dashboard.version}"'
+
+def _dashboard_stats_last_modified(request):
+    return get_request_dashboard(request).last_modified
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_dashboard_stats_etag, last_modified_func=_dashboard_stats_last_modified)
+def dashboard_stats(request):
+    """
+    All dashboard fragments in one response: out-of-band HTMX swaps, or JSON
+    with ?format=json. Answers 304 Not Modified while the dashboard's data
+    versions are unchanged.
+    """
+    dashboard = get_request_dashboard(request)
+    if _dashboard_stats_format(request) == 'html':
+        return render(request, 'dashboard/stats.html', dashboard.template_context())
     
-    context = {
-        'classroom_count': classroom_count,
-        'assignment_count': assignment_count,
-        'recent_classrooms': recent_classrooms,
-        'activities': activities,
-    }
+    context = dashboard.context
     
-    return render(request, 'base/dashboard.html', context)
+    activity_page = context['activity_page']
+    return JsonResponse({
+        'classroom_count': context['classroom_count'],
+        'assignment_count': context['assignment_count'],
+        'recent_classrooms': [
+            {
+                'id': classroom.pk,
+                'name': classroom.name,
+                'section': classroom.section,
+                'subject': classroom.subject,
+                'student_count': classroom.student_count,
+                'url': reverse('classroom:detail', args=[classroom.pk]),
+            }
+            for classroom in context['recent_classrooms']
+        ],
+        'activity': [
+            {
+                'verb': entry.event.verb,
+                'title': entry.event.title,
+                'description': entry.event.description,
+                'actor': entry.event.actor.get_full_name() or entry.event.actor.username,
+                'created_at': entry.event.created_at,
+            }
+            for entry in activity_page
+        ],
+        'activity_next_cursor': activity_page.next_cursor,
+    })
 
 # HTMX endpoints for dashboard statistics
 @login_required
+@use_replica
 def dashboard_classroom_stats(request):
     """HTMX endpoint for classroom statistics."""
     user = request.user
@@ -120,13 +88,15 @@ def dashboard_classroom_stats(request):
     return HttpResponse(f"{count}")
 
 @login_required
+@use_replica
 def dashboard_enrolled_stats(request):
     """HTMX endpoint for student enrollment statistics."""
     user = request.user
-    count = ClassroomMember.objects.filter(user=user).count()
+    count = ClassroomMember.objects.filter(user=user, is_active=True).count()
     return HttpResponse(f"{count}")
 
 @login_required
+@use_replica
 def dashboard_assignment_stats(request):
     """HTMX endpoint for assignment statistics for teachers."""
     user = request.user
@@ -137,21 +107,20 @@ def dashboard_assignment_stats(request):
     return HttpResponse(f"{count}")
 
 @login_required
+@use_replica
 def dashboard_pending_stats(request):
     """HTMX endpoint for pending assignment statistics for students."""
     user = request.user
     if not user.is_teacher:
         # Count assignments not yet submitted
-        classrooms = ClassroomMember.objects.filter(user=user).values_list('classroom', flat=True)
-        assignments = Assignment.objects.filter(classroom__in=classrooms, is_published=True)
-        submissions = AssignmentSubmission.objects.filter(student=user).values_list('assignment', flat=True)
-        count = assignments.exclude(id__in=submissions).count()
+        count = PendingAssignment.objects.filter(student=user).count()
     else:
         count = 0
     return HttpResponse(f"{count}")
 
 
 @login_required
+@use_replica
 def dashboard_recent_classes(request):
     """HTMX endpoint for recent classes."""
     user = request.user
@@ -159,55 +128,40 @@ def dashboard_recent_classes(request):
     if user.is_teacher or user.is_admin:
         classrooms = Classroom.objects.filter(creator=user).order_by('-created_at')[:5]
     else:
-        memberships = ClassroomMember.objects.filter(user=user).select_related('classroom').order_by('-joined_at')[:5]
+        memberships = ClassroomMember.objects.filter(user=user, is_active=True).select_related('classroom').order_by('-joined_at')[:5]
         classrooms = [membership.classroom for membership in memberships]
     
     return render(request, 'dashboard/recent_classes.html', {'classrooms': classrooms})
 
 @login_required
+@use_replica
 def dashboard_recent_activity(request):
-    """HTMX endpoint for recent activity."""
-    user = request.user
-    
-    # This would be a more complex query in a real application
-    # For now, we'll create a simple representation
-    activities = []
-    
-    if user.is_teacher or user.is_admin:
-        # Recent submissions for teacher's/admin's assignments
-        recent_submissions = AssignmentSubmission.objects.filter(
-            assignment__created_by=user
-        ).select_related('student', 'assignment').order_by('-submitted_at')[:10]
-        
-        for submission in recent_submissions:
-            activities.append({
-                'type': 'submission',
-                'title': f"Submission: {submission.assignment.title}",
-                'user': submission.student.username,
-                'timestamp': submission.submitted_at,
-                'description': f"Submitted {'late' if submission.is_late else 'on time'}"
-            })
-            
-    else:
-        # Recent assignments for students
-        classrooms = ClassroomMember.objects.filter(user=user).values_list('classroom', flat=True)
-        
-        recent_assignments = Assignment.objects.filter(
-            classroom__in=classrooms,
-            is_published=True
-        ).order_by('-created_at')[:5]
-        
-        for assignment in recent_assignments:
-            activities.append({
-                'type': 'assignment',
-                'title': assignment.title,
-                'user': assignment.created_by.username,
-                'timestamp': assignment.created_at,
-                'description': f"New assignment in {assignment.classroom.name}"
-            })
+    """HTMX endpoint for recent activity, paginated by cursor."""
+    page = feed_page(request.user, request.GET.get('cursor'), per_page=ACTIVITY_PER_PAGE)
+    return render(request, 'dashboard/recent_activity.html', {'page': page})
+
+
+@login_required
+def search_view(request):
+    """
+    Full-text search over the classrooms the user can see, best matches
+    first. ?format=json returns the results as JSON; their title and
+    snippet are HTML with the matched words wrapped in <mark>.
+    """
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    kind = request.GET.get('kind', '')
+    results = search(request.user, query, [kind] if kind in KINDS_BY_NAME else None) if query else []
     
-    # Sort all activities by timestamp
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    activities = activities[:10]  # Limit to 10 items
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'query': query,
+            'results': [result.as_dict() for result in results],
+        })
     
-    return render(request, 'dashboard/recent_activity.html', {'activities': activities})
+    context = {
+        'query': query,
+        'kind': kind,
+        'kinds': [(name, name.replace('_', ' ').capitalize()) for name in KINDS_BY_NAME],
+        'results': results,
+    }
+    return render(request, 'search/results.html', context)